@@ -0,0 +1,152 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+"""
+Compare the skeletonization methods of create_skeleton() on the images in data/, for speed and for their effect
+downstream: the number of skeleton pixels, junctions and paths, and the runtime of TGGLinesPlus().
+
+Run from the notebooks folder:
+    python -m benchmarks.skeleton_methods
+    python -m benchmarks.skeleton_methods --methods zhang lee --repeat 5 --backend networkx
+"""
+
+import argparse
+import os
+import timeit
+
+from utils.datasets import decode_image
+from utils.process import SKELETON_METHODS, TGGLinesPlus, create_binary, create_binary_reverse, create_skeletons
+
+
+# (name, path relative to the data folder, whether the lines are dark on a light background)
+BENCHMARK_IMAGES = [
+    ("deepcrack", "deepcrack/11215-5.png", False),
+    ("rs_imagery_1", "rs_imagery/test_image1.png", False),
+    ("rs_imagery_2", "rs_imagery/test_image2.png", False),
+    ("rs_imagery_3", "rs_imagery/test_image3.png", False),
+    ("mass_roads", "mass_roads/11278840_15.tif", False),
+    ("abq_contours", "abq_contours_50ft.png", True),
+]
+
+
+def load_benchmark_binaries(data_dir: str = "../data") -> dict:
+    """
+    Read and binarize the benchmark images.
+
+    Parameters:
+        data_dir: the location of the data folder
+
+    Returns:
+        binaries: a dictionary with image names as keys and binaries as values, images that are missing are left out
+    """
+    binaries = {}
+    for name, path, reverse in BENCHMARK_IMAGES:
+        path = os.path.join(data_dir, path)
+        if(not os.path.exists(path)):
+            continue
+
+        image = decode_image(path, path, as_gray=True)
+        binaries[name] = create_binary_reverse(image) if reverse else create_binary(image)
+
+    return binaries
+
+
+def benchmark_skeleton_methods(binaries: dict, methods: list = None, repeat: int = 3, backend: str = "csr") -> list:
+    """
+    Skeletonize every binary with every method, then run TGGLinesPlus() on the skeleton.
+
+    Parameters:
+        binaries: a dictionary of binaries, from load_benchmark_binaries()
+
+        methods: a list of names from SKELETON_METHODS, None benchmarks all of them
+
+        repeat: the number of times to skeletonize each binary, the fastest time is reported
+
+        backend: the TGGLinesPlus() backend
+
+    Returns:
+        rows: a list of dictionaries, one per image and method, with the skeletonization time, number of skeleton pixels,
+              junctions and paths, and TGGLinesPlus() runtime (or the error TGGLinesPlus() raised)
+    """
+    if(methods is None):
+        methods = list(SKELETON_METHODS)
+
+    rows = []
+    for name, binary in binaries.items():
+        for method in methods:
+            timer = timeit.Timer(lambda: create_skeletons([binary], method))
+            skeleton_seconds = min(timer.repeat(repeat=repeat, number=1))
+            skeleton = create_skeletons([binary], method)[0]
+
+            row = {
+                "image": name,
+                "method": method,
+                "skeleton_seconds": skeleton_seconds,
+                "skeleton_pixels": int(skeleton.sum()),
+                "junctions": None,
+                "paths": None,
+                "tgglinesplus_seconds": None,
+                "error": None,
+            }
+            try:
+                result_dict = TGGLinesPlus(skeleton, backend=backend, keys=["junction_nodes", "paths_list", "runtime"])
+                row["junctions"] = len(result_dict["junction_nodes"])
+                row["paths"] = len(result_dict["paths_list"])
+                row["tgglinesplus_seconds"] = result_dict["runtime"]
+            except Exception as error:
+                row["error"] = str(error)
+
+            rows.append(row)
+
+    return rows
+
+
+def print_benchmark(rows: list) -> None:
+    """
+    Print the rows from benchmark_skeleton_methods() as a table.
+    """
+    print(f"{'image':<14}{'method':<13}{'skeleton (s)':>13}{'pixels':>9}{'junctions':>11}{'paths':>8}{'TGGLinesPlus (s)':>18}")
+    for row in rows:
+        if(row["error"] is not None):
+            downstream = f"  error: {row['error']}"
+        else:
+            downstream = f"{row['junctions']:>11}{row['paths']:>8}{row['tgglinesplus_seconds']:>18.4f}"
+        print(f"{row['image']:<14}{row['method']:<13}{row['skeleton_seconds']:>13.4f}{row['skeleton_pixels']:>9}" + downstream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the skeletonization methods of create_skeleton() on the images in data/")
+    parser.add_argument("--data-dir", default="../data", help="the location of the data folder")
+    parser.add_argument("--methods", nargs="+", choices=list(SKELETON_METHODS), default=None, help="the methods to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of times to time each skeletonization")
+    parser.add_argument("--backend", default="csr", choices=["csr", "networkx"], help="the TGGLinesPlus() backend")
+    args = parser.parse_args()
+
+    rows = benchmark_skeleton_methods(load_benchmark_binaries(args.data_dir), args.methods, args.repeat, args.backend)
+    print_benchmark(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Time every stage of the TGGLinesPlus() pipeline on its own, on the images in data/ and a sample of MNIST digits,
+save the times as a JSON baseline, and compare two baselines to find regressions.
+
+The stages follow TGGLinesPlus(..., backend="csr"):
+    create_binary          create_binary() (or create_binary_reverse())
+    create_skeleton        create_skeleton()
+    create_skeleton_graph  create_skeleton_graph(), the pixel graph the NetworkX backend starts from
+    create_csr_graph       create_csr_graph() and find_csr_components()
+    cliques                find_node_degrees(), find_window_cliques() and the removal of the diagonal edges
+    segment_paths          trace_paths(), which segments the paths in place of the segment_paths() of the paper
+    coverage               find_uncovered_nodes()
+
+Run from the notebooks folder:
+    python -m benchmarks.stages run --output benchmarks/baselines/main.json
+    python -m benchmarks.stages run --images deepcrack mnist --baseline benchmarks/baselines/main.json
+    python -m benchmarks.stages compare benchmarks/baselines/main.json benchmarks/baselines/branch.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+
+import numpy as np
+
+from benchmarks.skeleton_methods import BENCHMARK_IMAGES
+from utils.csr_graph import create_csr_graph, find_csr_components
+from utils.datasets import decode_image
+from utils.process import (create_binary, create_binary_reverse, create_skeleton, create_skeleton_graph, find_node_degrees,
+                           find_uncovered_nodes, find_window_cliques, load_mnist, trace_paths, update_node_degrees)
+
+
+STAGES = ["create_binary", "create_skeleton", "create_skeleton_graph", "create_csr_graph", "cliques", "segment_paths", "coverage"]
+
+MNIST_CSV = "mnist/mnist_test.csv"
+
+
+def load_benchmark_images(data_dir: str = "../data", mnist_samples: int = 100) -> dict:
+    """
+    Read the benchmark images. MNIST digits are too small to time one at a time, so the first mnist_samples digits
+    of the MNIST test set are timed together as one "mnist" entry.
+
+    Parameters:
+        data_dir: the location of the data folder
+
+        mnist_samples: the number of MNIST digits to use, 0 leaves MNIST out
+
+    Returns:
+        images: a dictionary with image names as keys and (list of images, reverse) as values, where reverse tells
+                whether the lines are dark on a light background, images that are missing are left out
+    """
+    images = {}
+    for name, path, reverse in BENCHMARK_IMAGES:
+        path = os.path.join(data_dir, path)
+        if(os.path.exists(path)):
+            images[name] = ([decode_image(path, path, as_gray=True)], reverse)
+
+    mnist_path = os.path.join(data_dir, MNIST_CSV)
+    if(mnist_samples > 0 and os.path.exists(mnist_path)):
+        mnist_images, _ = load_mnist(mnist_path)
+        images["mnist"] = (list(mnist_images[:mnist_samples]), False)
+
+    return images
+
+
+def run_stages(image: np.ndarray, reverse: bool) -> dict:
+    """
+    Run every stage once on one image, and return the inputs each stage needs (and the sizes of what it made).
+    """
+    state = {"image": image, "reverse": reverse}
+    state["binary"] = create_binary_reverse(image) if reverse else create_binary(image)
+    state["skeleton"] = create_skeleton(state["binary"])
+    state["csr_graph"], _, state["skeleton_array"] = create_csr_graph(state["skeleton"])
+    labels, _, component_offsets = find_csr_components(state["skeleton_array"])
+    state["node_mask"] = (np.diff(component_offsets) >= 3)[labels]
+    state["simple_csr_graph"], state["degrees_updated"], state["cliques"] = find_stage_cliques(state["skeleton"], state["csr_graph"])
+    state["paths_list"] = segment_stage_paths(state["simple_csr_graph"], state["degrees_updated"], state["node_mask"])
+
+    return state
+
+
+def find_stage_cliques(skeleton: np.ndarray, csr_graph):
+    """
+    The cliques stage: find the cliques and remove their diagonal edges, like TGGLinesPlus_csr().
+    """
+    degrees = find_node_degrees(skeleton)
+    unique_cliques, edges_to_remove = find_window_cliques(skeleton, degrees)
+
+    return csr_graph.remove_edges(edges_to_remove), update_node_degrees(degrees, edges_to_remove), unique_cliques
+
+
+def segment_stage_paths(simple_csr_graph, degrees_updated: np.ndarray, node_mask: np.ndarray) -> list:
+    """
+    The segment_paths stage: trace the paths of every component with 3 or more nodes, like TGGLinesPlus_csr().
+    """
+    simple_csr_graph = simple_csr_graph.restrict(np.flatnonzero(node_mask).astype(np.int32))
+    pathseg_mask = node_mask & ((degrees_updated == 1) | (degrees_updated >= 3))
+
+    return trace_paths(simple_csr_graph, np.flatnonzero(pathseg_mask).tolist())
+
+
+# each stage, as a function of the state from run_stages()
+STAGE_FUNCTIONS = {
+    "create_binary": lambda state: create_binary_reverse(state["image"]) if state["reverse"] else create_binary(state["image"]),
+    "create_skeleton": lambda state: create_skeleton(state["binary"]),
+    "create_skeleton_graph": lambda state: create_skeleton_graph(state["skeleton"], connectivity=2),
+    "create_csr_graph": lambda state: find_csr_components(create_csr_graph(state["skeleton"])[2]),
+    "cliques": lambda state: find_stage_cliques(state["skeleton"], state["csr_graph"]),
+    "segment_paths": lambda state: segment_stage_paths(state["simple_csr_graph"], state["degrees_updated"], state["node_mask"]),
+    "coverage": lambda state: find_uncovered_nodes(state["paths_list"], state["node_mask"]),
+}
+
+
+def benchmark_stages(images: dict, stages: list = None, repeat: int = 3) -> dict:
+    """
+    Time every stage on every image. Each stage is timed on its own, with the inputs made by the stages before it.
+
+    Parameters:
+        images: a dictionary of (list of images, reverse), from load_benchmark_images()
+
+        stages: a list of names from STAGES, None times all of them
+
+        repeat: the number of times to time each stage, the fastest time is reported
+
+    Returns:
+        results: a dictionary with image names as keys and dictionaries as values, holding the "seconds" of each stage
+                 (summed over the images of an entry) and the "sizes" of the output, to check that two baselines did the same work
+    """
+    if(stages is None):
+        stages = STAGES
+
+    results = {}
+    for name, (image_list, reverse) in images.items():
+        states = [run_stages(image, reverse) for image in image_list]
+
+        seconds = {}
+        for stage in stages:
+            stage_function = STAGE_FUNCTIONS[stage]
+            timer = timeit.Timer(lambda: [stage_function(state) for state in states])
+            seconds[stage] = min(timer.repeat(repeat=repeat, number=1))
+
+        sizes = {
+            "images": len(states),
+            "skeleton_pixels": sum(int(state["skeleton"].sum()) for state in states),
+            "cliques": sum(len(state["cliques"]) for state in states),
+            "paths": sum(len(state["paths_list"]) for state in states),
+        }
+        results[name] = {"seconds": seconds, "sizes": sizes}
+
+    return results
+
+
+def make_baseline(results: dict, repeat: int) -> dict:
+    """
+    Wrap the results from benchmark_stages() with the details of the machine they were measured on.
+    """
+    import scipy
+    import skimage
+
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "skimage": skimage.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def save_baseline(baseline: dict, filename: str) -> None:
+    """
+    Write a baseline from make_baseline() to a JSON file.
+    """
+    directory = os.path.dirname(filename)
+    if(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w") as json_file:
+        json.dump(baseline, json_file, indent=2)
+
+
+def load_baseline(filename: str) -> dict:
+    """
+    Read a baseline saved with save_baseline().
+    """
+    with open(filename, "r") as json_file:
+        return json.load(json_file)
+
+
+def compare_baselines(baseline: dict, current: dict, tolerance: float = 0.2, min_seconds: float = 0.001) -> list:
+    """
+    Compare the stage times of two baselines. A stage is a regression if it got slower by more than tolerance
+    (a fraction of the baseline time) and by more than min_seconds, which keeps the noise of very fast stages out.
+
+    Parameters:
+        baseline, current: baselines from make_baseline() or load_baseline()
+
+        tolerance: the allowed slowdown, e.g. 0.2 flags stages more than 20% slower
+
+        min_seconds: the smallest slowdown in seconds that is flagged
+
+    Returns:
+        rows: a list of dictionaries, one per image and stage found in both baselines, with the baseline and current
+              seconds, their ratio, the status ("regression", "improvement" or "ok"), and whether the sizes of the
+              output changed, in which case the two baselines did not do the same work
+    """
+    rows = []
+    for name, current_result in current["results"].items():
+        if(name not in baseline["results"]):
+            continue
+        baseline_result = baseline["results"][name]
+        sizes_changed = baseline_result["sizes"] != current_result["sizes"]
+
+        for stage, current_seconds in current_result["seconds"].items():
+            if(stage not in baseline_result["seconds"]):
+                continue
+            baseline_seconds = baseline_result["seconds"][stage]
+            difference = current_seconds - baseline_seconds
+
+            status = "ok"
+            if(difference > tolerance * baseline_seconds and difference > min_seconds):
+                status = "regression"
+            elif(-difference > tolerance * baseline_seconds and -difference > min_seconds):
+                status = "improvement"
+
+            rows.append({
+                "image": name,
+                "stage": stage,
+                "baseline_seconds": baseline_seconds,
+                "current_seconds": current_seconds,
+                "ratio": current_seconds / baseline_seconds if baseline_seconds > 0 else float("inf"),
+                "status": status,
+                "sizes_changed": sizes_changed,
+            })
+
+    return rows
+
+
+def print_results(results: dict) -> None:
+    """
+    Print the results from benchmark_stages() as a table, one row per image and one column per stage.
+    """
+    stages = list(dict.fromkeys(stage for result in results.values() for stage in result["seconds"]))
+    print(f"{'image':<14}" + "".join(f"{stage:>23}" for stage in stages))
+    for name, result in results.items():
+        print(f"{name:<14}" + "".join(f"{result['seconds'][stage]:>23.4f}" for stage in stages))
+
+
+def print_comparison(rows: list) -> None:
+    """
+    Print the rows from compare_baselines() as a table.
+    """
+    print(f"{'image':<14}{'stage':<23}{'baseline (s)':>13}{'current (s)':>13}{'ratio':>8}  status")
+    for row in rows:
+        note = " (sizes changed)" if row["sizes_changed"] else ""
+        print(f"{row['image']:<14}{row['stage']:<23}{row['baseline_seconds']:>13.4f}{row['current_seconds']:>13.4f}"
+              f"{row['ratio']:>8.2f}  {row['status']}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the TGGLinesPlus() pipeline and compare baselines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="time the stages, optionally save a baseline or compare with one")
+    run_parser.add_argument("--data-dir", default="../data", help="the location of the data folder")
+    run_parser.add_argument("--images", nargs="+", default=None, help="the images to time, by default every image found")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=None, help="the stages to time")
+    run_parser.add_argument("--mnist-samples", type=int, default=100, help="the number of MNIST digits to time together")
+    run_parser.add_argument("--repeat", type=int, default=3, help="the number of times to time each stage")
+    run_parser.add_argument("--output", default=None, help="save the times as a JSON baseline to this file")
+    run_parser.add_argument("--baseline", default=None, help="compare the times with this JSON baseline")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two JSON baselines")
+    compare_parser.add_argument("baseline", help="the JSON baseline to compare with")
+    compare_parser.add_argument("current", help="the JSON baseline to check for regressions")
+
+    for subparser in [run_parser, compare_parser]:
+        subparser.add_argument("--tolerance", type=float, default=0.2, help="the allowed slowdown as a fraction, e.g. 0.2 for 20%%")
+        subparser.add_argument("--min-seconds", type=float, default=0.001, help="the smallest slowdown in seconds that is flagged")
+    args = parser.parse_args()
+
+    if(args.command == "run"):
+        images = load_benchmark_images(args.data_dir, args.mnist_samples)
+        if(args.images is not None):
+            images = dict([(name, images[name]) for name in args.images if name in images])
+        current = make_baseline(benchmark_stages(images, args.stages, args.repeat), args.repeat)
+        print_results(current["results"])
+        if(args.output is not None):
+            save_baseline(current, args.output)
+        if(args.baseline is None):
+            return
+        baseline = load_baseline(args.baseline)
+        print()
+    else:
+        baseline = load_baseline(args.baseline)
+        current = load_baseline(args.current)
+
+    rows = compare_baselines(baseline, current, args.tolerance, args.min_seconds)
+    print_comparison(rows)
+
+    # a non-zero exit status lets scripts and CI jobs fail on regressions
+    if(any(row["status"] == "regression" for row in rows)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+import os
+import sys
+
+# the tests import utils the same way the notebooks do, from the notebooks folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
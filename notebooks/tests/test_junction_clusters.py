@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check TGGLinesPlus(..., contract_junctions=True): paths are expanded back to neighboring pixels, and skeletons without
+junction clusters give the same result as without contraction.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+from skimage.morphology import skeletonize
+
+from utils.process import TGGLinesPlus
+
+
+def random_skeleton(seed: int):
+    rng = np.random.default_rng(seed)
+    return np.pad(skeletonize(rng.random((30, 30)) < 0.5), 1)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_contracted_paths_are_expanded(seed):
+    result_dict = TGGLinesPlus(random_skeleton(seed), backend="csr", contract_junctions=True)
+    simple_graph = result_dict["simple_graph"]
+    clusters = result_dict["junction_clusters"]
+    pathseg_points = set(result_dict["pathseg_points"])
+
+    assert len(clusters) > 0
+    assert all(len(cluster) >= 2 for cluster in clusters)
+    cluster_nodes = [node for cluster in clusters for node in cluster]
+    assert len(set(cluster_nodes)) == len(cluster_nodes)
+    assert result_dict["node_types"].count("I") == len(cluster_nodes) - len(clusters)
+
+    # every path is a walk over the pixel graph (without the removed edges) between path segmentation points, or a loop
+    for path in result_dict["paths_list"]:
+        assert all(simple_graph.has_edge(node, next_node) for (node, next_node) in zip(path, path[1:]))
+        assert path[0] == path[-1] or (path[0] in pathseg_points and path[-1] in pathseg_points)
+
+
+def test_no_clusters_unchanged():
+    # a cross and a T, whose junctions are single pixels
+    skeleton = np.zeros((16, 16), dtype=bool)
+    skeleton[4, 1:10] = skeleton[1:10, 5] = True
+    skeleton[12, 2:15] = skeleton[12:15, 8] = True
+    expected_dict = TGGLinesPlus(skeleton, backend="csr")
+    result_dict = TGGLinesPlus(skeleton, backend="csr", contract_junctions=True)
+
+    assert result_dict["junction_clusters"] == []
+    for key in ["end_nodes", "junction_nodes", "node_types", "paths_list", "pathseg_points", "removed_edges"]:
+        assert result_dict[key] == expected_dict[key]
@@ -0,0 +1,86 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check that save_result() and load_result() round trip a TGGLinesPlus() result, and that lazy results are saved and
+loaded (and exported) without building the values that are not accessed.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from utils.export import export_paths
+from utils.process import TGGLinesPlus
+from utils.results import load_result, save_result
+
+
+def make_skeleton():
+    # a loop with a tail, a cross, and a speckle pixel
+    skeleton = np.zeros((16, 20), dtype=bool)
+    skeleton[2, 2:8] = skeleton[7, 2:8] = True
+    skeleton[2:8, 2] = skeleton[2:8, 7] = True
+    skeleton[7:13, 5] = True
+    skeleton[10, 10:18] = skeleton[3:15, 14] = True
+    skeleton[14, 2] = True
+
+    return skeleton
+
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_round_trip(backend, tmp_path):
+    result_dict = TGGLinesPlus(make_skeleton(), backend=backend)
+    save_result(result_dict, tmp_path / "result.npz")
+    loaded_dict = load_result(tmp_path / "result.npz")
+
+    for key in ["cliques", "end_nodes", "junction_nodes", "node_types", "paths_list", "pathseg_points", "removed_edges"]:
+        assert loaded_dict[key] == result_dict[key]
+    assert np.array_equal(loaded_dict["skeleton"], result_dict["skeleton"])
+    assert [subgraph_dict["paths_list"] for subgraph_dict in loaded_dict["subgraphs_list"]] == \
+           [subgraph_dict["paths_list"] for subgraph_dict in result_dict["subgraphs_list"]]
+
+
+def test_lazy_round_trip(tmp_path):
+    result = TGGLinesPlus(make_skeleton(), backend="csr", lazy=True)
+    save_result(result, tmp_path / "result.npz")
+    assert "subgraphs_list" not in result.values
+
+    loaded = load_result(tmp_path / "result.npz", lazy=True)
+    assert "paths_list" not in loaded.values and "cliques" not in loaded.values
+    assert loaded["paths_list"] == result["paths_list"]
+    assert loaded["cliques"] == result["cliques"]
+    assert loaded["removed_edges"] == result["removed_edges"]
+
+
+def test_export_lazy_paths(tmp_path):
+    result = TGGLinesPlus(make_skeleton(), backend="csr", lazy=True)
+    assert export_paths(result, str(tmp_path / "lazy.csv")) == len(result["paths_list"])
+    assert "subgraphs_list" not in result.values
+
+    export_paths(result.to_dict(), str(tmp_path / "dict.csv"))
+    assert (tmp_path / "lazy.csv").read_text() == (tmp_path / "dict.csv").read_text()
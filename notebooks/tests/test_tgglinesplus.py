@@ -0,0 +1,92 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check TGGLinesPlus() on skeletons without any subgraph to segment, on both backends, on a subgraph that runs out
+of its budget, and with only some keys asked for.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from utils.process import TGGLinesPlus
+
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_empty_skeleton(backend):
+    result_dict = TGGLinesPlus(np.zeros((13, 12), dtype=bool), backend=backend)
+
+    for key in ["cliques", "end_nodes", "junction_nodes", "node_types", "paths_list", "pathseg_points", "removed_edges",
+                "skeleton_coordinates", "subgraphs_list"]:
+        assert list(result_dict[key]) == []
+    assert result_dict["skeleton_graph"].number_of_nodes() == 0
+
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_speckle_only_skeleton(backend):
+    # two components of 2 pixels and one of 1 pixel, all of them speckle
+    skeleton = np.zeros((12, 12), dtype=bool)
+    skeleton[2, 2:4] = True
+    skeleton[6, 6] = skeleton[7, 7] = True
+    skeleton[10, 2] = True
+    result_dict = TGGLinesPlus(skeleton, backend=backend)
+
+    assert result_dict["paths_list"] == []
+    assert result_dict["subgraphs_list"] == []
+    assert result_dict["node_types"] == []
+    assert len(result_dict["skeleton_coordinates"]) == 5
+    assert result_dict["skeleton_graph"].number_of_edges() == 2
+
+
+@pytest.mark.parametrize("on_budget_exceeded", ["fallback", "skip"])
+def test_budget_exceeded(on_budget_exceeded):
+    # a grid of lines is one subgraph with many loops, far more than 50 graph operations to trace
+    skeleton = np.zeros((25, 25), dtype=bool)
+    skeleton[2:23:4, 2:23] = True
+    skeleton[2:23, 2:23:4] = True
+    expected_dict = TGGLinesPlus(skeleton)
+    result_dict = TGGLinesPlus(skeleton, component_operations=50, on_budget_exceeded=on_budget_exceeded)
+
+    assert [budget["subgraph"] for budget in result_dict["budget_exceeded"]] == [0]
+    if(on_budget_exceeded == "fallback"):
+        assert result_dict["paths_list"] == expected_dict["paths_list"]
+    else:
+        assert result_dict["paths_list"] == []
+
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_keys(backend):
+    skeleton = np.zeros((12, 12), dtype=bool)
+    skeleton[2, 2:10] = skeleton[2:10, 6] = True
+    expected_dict = TGGLinesPlus(skeleton, backend=backend)
+    result_dict = TGGLinesPlus(skeleton, backend=backend, keys=["paths_list", "end_nodes"])
+
+    assert list(result_dict) == ["paths_list", "end_nodes"]
+    assert result_dict["paths_list"] == expected_dict["paths_list"]
+    assert result_dict["end_nodes"] == expected_dict["end_nodes"]
@@ -0,0 +1,153 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check that binarizing an image one tile at a time with iter_binary_tiles() gives the same result as binarizing
+the whole image with threshold_local() at once, and that TGGLinesPlus_tiled() finds the same paths as TGGLinesPlus()
+on the whole image, or rejects a margin that is too small for that.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import os
+import re
+
+import numpy as np
+import pytest
+from skimage.filters import threshold_local
+
+from utils.datasets import decode_image
+from utils.process import TGGLinesPlus, TGGLinesPlus_tiled, create_binary, create_skeleton, iter_binary_tiles
+
+
+def make_image(shape=(90, 75), seed=0):
+    # noise plus flat blocks, where many pixels are equal to their local threshold
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    image[10:40, 5:50] = 200
+    image[50:85, 30:70] = 17
+
+    return image
+
+
+def binarize_tiles(image, tile_size, **kwargs):
+    binary = np.zeros(image.shape, dtype=bool)
+    for tile_window, read_window, tile_binary in iter_binary_tiles(lambda window: image[window.toslices()], *image.shape,
+                                                                   tile_size, tile_size, **kwargs):
+        assert tile_binary.shape == (read_window.height, read_window.width)
+        binary[tile_window.toslices()] = tile_binary[tile_window.row_off - read_window.row_off:,
+                                                     tile_window.col_off - read_window.col_off:][:tile_window.height,
+                                                                                                 :tile_window.width]
+
+    return binary
+
+
+@pytest.mark.parametrize("method", ["gaussian", "median"])
+@pytest.mark.parametrize("block_size", [7, 21])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_local_threshold_tiles(method, block_size, reverse):
+    image = make_image()
+    local_threshold = threshold_local(image, block_size, method=method, offset=2)
+    expected = image < local_threshold if reverse else image > local_threshold
+
+    binary = binarize_tiles(image, 32, halo=5, reverse=reverse, local_block_size=block_size, local_method=method,
+                            local_offset=2)
+
+    assert np.array_equal(binary, expected)
+
+
+@pytest.mark.parametrize("method", ["mean", "generic"])
+def test_unsupported_local_threshold_tiles(method):
+    with pytest.raises(ValueError, match="local_method"):
+        binarize_tiles(make_image(), 32, local_block_size=7, local_method=method)
+
+
+def make_line_image():
+    # lines 3 pixels wide: a rectangle with a cross through it (so loops), and a diagonal with a branch
+    image = np.zeros((70, 90), dtype=np.uint8)
+    image[5:8, 5:60] = image[40:43, 5:60] = 255
+    image[5:43, 5:8] = image[5:43, 57:60] = 255
+    image[22:25, 5:60] = image[5:43, 30:33] = 255
+    for idx in range(40):
+        image[25 + idx:28 + idx, 45 + idx] = 255
+    image[50:53, 60:88] = 255
+
+    return image
+
+
+def canonical_loop(path: list) -> list:
+    # start a loop at its smallest location and walk it towards its smaller neighbor, loops can start anywhere
+    if(path[0] != path[-1]):
+        return path
+    nodes = path[:-1]
+    start = nodes.index(min(nodes))
+    nodes = nodes[start:] + nodes[:start]
+    if(nodes[-1] < nodes[1]):
+        nodes = nodes[:1] + nodes[:0:-1]
+
+    return nodes + nodes[:1]
+
+
+@pytest.mark.parametrize("tile_size", [16, 23, 64])
+def test_tiled_matches_single_pass(tile_size):
+    image = make_line_image()
+    result_dict = TGGLinesPlus(create_skeleton(create_binary(image)), backend="csr")
+    locations = np.asarray(result_dict["skeleton_coordinates"]).tolist()
+
+    tiled_dict = TGGLinesPlus_tiled(image, tile_size=tile_size, margin=8)
+
+    for key in ["end_nodes", "junction_nodes", "pathseg_points"]:
+        assert tiled_dict[key] == [locations[node] for node in result_dict[key]]
+    for key in ["cliques", "removed_edges"]:
+        assert tiled_dict[key] == sorted([[locations[node] for node in node_list] for node_list in result_dict[key]])
+    assert sorted(map(canonical_loop, tiled_dict["paths_list"])) == \
+           sorted([canonical_loop([locations[node] for node in path]) for path in result_dict["paths_list"]])
+
+
+def test_tiled_margin_too_small():
+    # a blob 21 pixels wide across the edges of the first tiles, which needs a much larger margin than the lines
+    image = make_line_image()
+    image[10:31, 10:31] = 255
+    result_dict = TGGLinesPlus(create_skeleton(create_binary(image)), backend="csr")
+
+    with pytest.raises(ValueError, match="is too small") as error:
+        TGGLinesPlus_tiled(image, tile_size=23, margin=8)
+    margin = int(re.search(r"needs margin=(\d+)", str(error.value)).group(1))
+
+    tiled_dict = TGGLinesPlus_tiled(image, tile_size=23, margin=margin)
+    assert len(tiled_dict["paths_list"]) == len(result_dict["paths_list"])
+    assert tiled_dict["pathseg_points"] == [np.asarray(result_dict["skeleton_coordinates"]).tolist()[node]
+                                            for node in result_dict["pathseg_points"]]
+
+
+def test_tiled_margin_too_small_image():
+    # the thick lines of this image used to make stitch_fragments() fail with tiles of 64 and a margin of 16
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "rs_imagery", "test_image2.png")
+    image = decode_image(path, path, as_gray=True)
+
+    with pytest.raises(ValueError, match="margin=16 is too small"):
+        TGGLinesPlus_tiled(image, tile_size=64, margin=16)
@@ -0,0 +1,143 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check that trace_paths() returns the same paths as segment_paths(), loops included, on small skeletons where an
+earlier version oriented a loop the other way, because it missed the chains that get_initial_paths() leaves behind,
+and the same cycles on random skeletons.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from utils.csr_graph import create_csr_graph
+from utils.process import find_node_degrees, find_window_cliques, segment_paths, trace_paths, update_node_degrees
+
+
+SKELETONS = {
+    # a 3 node loop whose left over component holds a chain with a later node than the loop
+    "leftover_chain": ["0000000000",
+                       "0010011100",
+                       "0111011010",
+                       "0100011010",
+                       "0101110100",
+                       "0001010000",
+                       "0000000000"],
+    "leftover_chain_tall": ["0000000",
+                            "0011000",
+                            "0000110",
+                            "0010100",
+                            "0001000",
+                            "0110010",
+                            "0010110",
+                            "0011000",
+                            "0001010",
+                            "0011000",
+                            "0100000",
+                            "0011110",
+                            "0111000",
+                            "0101000",
+                            "0000000"],
+    # chains exactly as long as the path over path segmentation points, which find_leftover_chains() counts as left over
+    "tied_chain": ["0000000000000",
+                   "0101101100110",
+                   "0100101011010",
+                   "0000010100000",
+                   "0110010001110",
+                   "0110100001110",
+                   "0000000000000"],
+    "tied_chain_small": ["0000000",
+                         "0100000",
+                         "0110000",
+                         "0001010",
+                         "0110100",
+                         "0101000",
+                         "0000000"],
+}
+
+
+def simplify_skeleton(skeleton):
+    """
+    Build the pixel graph of a skeleton (an array, or a list of rows of "0" and "1"), remove the diagonal clique edges
+    and find the path segmentation points, like TGGLinesPlus() does.
+    """
+    skeleton = np.array([[pixel == "1" for pixel in row] for row in skeleton]) if isinstance(skeleton, list) else skeleton
+    csr_graph, _, skeleton_array = create_csr_graph(skeleton)
+
+    degrees = find_node_degrees(skeleton)
+    _, edges_to_remove = find_window_cliques(skeleton, degrees)
+    degrees_updated = update_node_degrees(degrees, edges_to_remove)
+
+    simple_graph = nx.from_scipy_sparse_array(skeleton_array)
+    simple_graph.remove_edges_from(edges_to_remove.tolist())
+    pathseg_points = np.flatnonzero((degrees_updated == 1) | (degrees_updated >= 3)).tolist()
+
+    return simple_graph, csr_graph.remove_edges(edges_to_remove), pathseg_points
+
+
+@pytest.mark.parametrize("name", list(SKELETONS))
+def test_trace_paths_matches_segment_paths(name):
+    simple_graph, simple_csr_graph, pathseg_points = simplify_skeleton(SKELETONS[name])
+    expected_paths = segment_paths(simple_graph.copy(), pathseg_points)
+
+    assert any(path[0] == path[-1] for path in expected_paths)
+    assert trace_paths(simple_graph, pathseg_points) == expected_paths
+    assert trace_paths(simple_csr_graph, pathseg_points) == expected_paths
+
+
+def canonical_paths(paths_list: list) -> list:
+    """
+    Start every loop at its smallest node and walk it towards its smaller neighbor, so that loops are compared as cycles.
+    """
+    canonical_list = []
+    for path in paths_list:
+        if(path[0] == path[-1]):
+            nodes = path[:-1]
+            start = nodes.index(min(nodes))
+            nodes = nodes[start:] + nodes[:start]
+            if(len(nodes) > 2 and nodes[-1] < nodes[1]):
+                nodes = nodes[:1] + nodes[:0:-1]
+            path = nodes + nodes[:1]
+        canonical_list.append(path)
+
+    return sorted(canonical_list)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_trace_paths_matches_segment_paths_cycles(seed):
+    # ties between chains can make a loop start at a different node or run the other way, but never change its nodes
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        skeleton = np.pad(rng.random(rng.integers(5, 14, size=2)) < rng.uniform(0.3, 0.6), 1)
+        simple_graph, simple_csr_graph, pathseg_points = simplify_skeleton(skeleton)
+        expected_paths = canonical_paths(segment_paths(simple_graph.copy(), pathseg_points))
+
+        assert canonical_paths(trace_paths(simple_graph, pathseg_points)) == expected_paths
+        assert canonical_paths(trace_paths(simple_csr_graph, pathseg_points)) == expected_paths
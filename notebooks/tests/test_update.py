@@ -0,0 +1,85 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+"""
+Check that TGGLinesPlus_update() gives the same result as TGGLinesPlus_csr() on the changed skeleton, over a series
+of edits that erase, add and replace pixels in a region.
+
+Run from the notebooks folder:
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+from rasterio.windows import Window
+from skimage.morphology import skeletonize
+
+from utils.process import TGGLinesPlus_csr, TGGLinesPlus_update
+
+
+KEYS = ["cliques", "end_nodes", "junction_nodes", "node_types", "paths_list", "pathseg_points", "removed_edges"]
+
+
+def random_skeleton(rng, shape=(40, 50)):
+    return np.pad(skeletonize(rng.random(shape) < 0.5), 1)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_update_matches_csr(lazy):
+    rng = np.random.default_rng(0)
+    skeleton = random_skeleton(rng)
+    result = TGGLinesPlus_csr(skeleton, build_graphs=not lazy, lazy=lazy)
+
+    for trial in range(9):
+        height, width = rng.integers(1, 15, size=2)
+        row, col = rng.integers(1, skeleton.shape[0] - height - 1), rng.integers(1, skeleton.shape[1] - width - 1)
+        region = Window(int(col), int(row), int(width), int(height))
+
+        new_skeleton = skeleton.copy()
+        if(trial % 3 == 0):
+            new_skeleton[region.toslices()] = False
+        elif(trial % 3 == 1):
+            new_skeleton[region.toslices()] |= rng.random((height, width)) < 0.1
+        else:
+            new_skeleton[region.toslices()] = random_skeleton(rng, (height, width))[1:-1, 1:-1]
+
+        result = TGGLinesPlus_update(result, new_skeleton, region, build_graphs=not lazy, lazy=lazy)
+        expected = TGGLinesPlus_csr(new_skeleton, build_graphs=not lazy, lazy=lazy)
+        for key in KEYS:
+            assert list(result[key]) == list(expected[key])
+        assert [subgraph_dict["paths_list"] for subgraph_dict in result["subgraphs_list"]] == \
+               [subgraph_dict["paths_list"] for subgraph_dict in expected["subgraphs_list"]]
+        skeleton = new_skeleton
+
+
+def test_update_outside_region():
+    skeleton = random_skeleton(np.random.default_rng(1))
+    result_dict = TGGLinesPlus_csr(skeleton)
+    new_skeleton = skeleton.copy()
+    new_skeleton[30, 30] = not new_skeleton[30, 30]
+
+    with pytest.raises(ValueError, match="outside of region"):
+        TGGLinesPlus_update(result_dict, new_skeleton, Window(0, 0, 10, 10))
@@ -0,0 +1,359 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+from collections.abc import Mapping, Sequence
+import re
+
+import numpy as np
+
+from scipy import sparse
+from scipy.sparse import csgraph
+from skimage import graph as skgraph
+
+
+class CSRGraph:
+    """
+    A read-only, undirected graph stored as compressed sparse row (CSR) arrays, used by the CSR backend of TGGLinesPlus().
+
+    Neighbors of node i are indices[indptr[i]:indptr[i+1]], sorted from smallest to largest. Nodes are the int32 ids
+    of skeleton pixels, in the same order as the nodes of a NetworkX graph built with nx.from_scipy_sparse_array().
+
+    The class implements just enough of the NetworkX graph interface (iterating over nodes, graph[node] for neighbors)
+    for methods like trace_paths() to run on it without building a NetworkX graph.
+
+    Parameters:
+        indptr: an int32 array of length N + 1 with the offset of each node's neighbors in indices
+
+        indices: an int32 array with the neighbors of every node
+
+        nodes: optional array of node ids to iterate over, e.g. the nodes of the connected components we want to process,
+               defaults to every node in the graph
+    """
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.nodes = np.arange(len(indptr) - 1, dtype=np.int32) if nodes is None else nodes
+
+    @classmethod
+    def from_sparse_array(cls, skeleton_array):
+        """
+        Build a CSRGraph from a scipy sparse matrix, e.g. the one returned by create_skeleton_graph() or skgraph.pixel_graph().
+        """
+        skeleton_array = skeleton_array.tocsr()
+        skeleton_array.sort_indices()
+
+        return cls(skeleton_array.indptr.astype(np.int32), skeleton_array.indices.astype(np.int32))
+
+    def __iter__(self):
+        return iter(self.nodes.tolist())
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, node: int) -> list:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]].tolist()
+
+    def degrees(self) -> np.ndarray:
+        """
+        Return the degree of every node in the graph (not only those in self.nodes), as an int32 array indexed by node id.
+        """
+        return np.diff(self.indptr).astype(np.int32)
+
+    def restrict(self, nodes: np.ndarray):
+        """
+        Return a CSRGraph sharing the same arrays, but only iterating over nodes.
+        """
+        return CSRGraph(self.indptr, self.indices, nodes)
+
+    def remove_edges(self, edges: np.ndarray):
+        """
+        Return a new CSRGraph with edges (an array of shape (k, 2) with one (u, v) pair per row) removed in both directions.
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if(len(edges) == 0):
+            return CSRGraph(self.indptr, self.indices, self.nodes)
+
+        num_nodes = len(self.indptr) - 1
+        rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(self.indptr))
+
+        # encode every (row, column) entry as one integer so we can match both directions of each edge at once
+        entry_keys = rows * num_nodes + self.indices
+        removed_keys = np.concatenate([edges[:, 0] * num_nodes + edges[:, 1], edges[:, 1] * num_nodes + edges[:, 0]])
+        keep = ~np.isin(entry_keys, removed_keys)
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows[keep], minlength=num_nodes), out=indptr[1:])
+
+        return CSRGraph(indptr, self.indices[keep], self.nodes)
+
+
+def create_csr_graph(skeleton: np.ndarray):
+    """
+    Build the 8-connected pixel graph of a skeleton and return it as CSR arrays.
+
+    Parameters:
+        skeleton: a numpy array retrieved from a call to create_skeleton()
+
+    Returns:
+        graph: a CSRGraph with one node per True/1 pixel in skeleton
+
+        coordinates: an int32 array of shape (N, 2) with the [x, y] location of each node
+
+        skeleton_array: the scipy sparse matrix from skgraph.pixel_graph(), with edge weights, for building NetworkX graphs later
+    """
+    skeleton_array, ravel_positions = skgraph.pixel_graph(skeleton, connectivity=2)
+    skeleton_array = skeleton_array.tocsr()
+    graph = CSRGraph.from_sparse_array(skeleton_array)
+    coordinates = np.stack(np.unravel_index(ravel_positions, skeleton.shape), axis=1).astype(np.int32)
+
+    return graph, coordinates, skeleton_array
+
+
+def find_csr_components(skeleton_array, order: str = "sorted"):
+    """
+    Label the connected components of a pixel graph, numbered in order of their smallest node like nx.connected_components().
+
+    Parameters:
+        skeleton_array: a scipy sparse matrix from create_csr_graph()
+
+        order: the order of the nodes within each component, "sorted" for smallest to largest, or "bfs" for the order in
+               which a breadth-first search from the smallest node finds them, which is the order nx.connected_components()
+               adds them to the set it returns for the component
+
+    Returns:
+        labels: an int32 array with the component label of every node
+
+        component_nodes: an int32 array of all nodes, sorted by component label (and node id within a component)
+
+        component_offsets: an array of length num_components + 1, where the nodes of component i are
+                           component_nodes[component_offsets[i]:component_offsets[i+1]]
+    """
+    num_components, labels = csgraph.connected_components(skeleton_array, directed=False)
+    labels = labels.astype(np.int32)
+    num_nodes = len(labels)
+
+    if(order not in ("bfs", "sorted")):
+        raise ValueError(f"Unknown order '{order}', expected 'sorted' or 'bfs'")
+    if(num_nodes == 0):
+        return labels, np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int64)
+
+    if(order == "bfs"):
+        # a single search from an extra node joined to the smallest node of every component visits each component in the
+        # same order as a search started from its smallest node, as nodes of other components never enter its part of the queue
+        first_nodes = np.flatnonzero(np.r_[True, np.diff(np.sort(labels)) > 0])
+        first_nodes = np.sort(np.argsort(labels, kind="stable")[first_nodes])
+        extra_edges = sparse.csr_matrix((np.ones(len(first_nodes)), (np.full(len(first_nodes), num_nodes), first_nodes)),
+                                        shape=(num_nodes + 1, num_nodes + 1))
+        search_graph = sparse.bmat([[skeleton_array, None], [None, sparse.csr_matrix((1, 1))]]).tocsr() + extra_edges + extra_edges.T
+        search_graph.sort_indices()
+        search_order = csgraph.breadth_first_order(search_graph, num_nodes, directed=False, return_predecessors=False)[1:]
+        component_nodes = search_order[np.argsort(labels[search_order], kind="stable")].astype(np.int32)
+    else:
+        component_nodes = np.argsort(labels, kind="stable").astype(np.int32)
+
+    component_offsets = np.zeros(num_components + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=num_components), out=component_offsets[1:])
+
+    return labels, component_nodes, component_offsets
+
+
+class NodeIndex:
+    """
+    An array-backed index between node ids and their [x, y] (row, column) pixel locations in a skeleton, for both single
+    and vectorized batch lookups, in place of the search_by_node / search_by_location dictionaries and the list of
+    coordinate lists. Nodes are looked up from locations with np.searchsorted() on the sorted raveled pixel positions of
+    the nodes, which costs 8 bytes per node, instead of a dense lookup array the size of the image.
+
+    The old dictionaries and list are still available as thin read-only views over the arrays, see search_by_node,
+    search_by_location and coordinates_list.
+
+    Parameters:
+        coordinates: an array of shape (N, 2) with the [x, y] location of each node, e.g. from create_csr_graph()
+
+        shape: the shape of the skeleton, defaults to the smallest shape holding every node
+    """
+    def __init__(self, coordinates, shape: tuple = None):
+        self.coordinates = np.asarray(coordinates, dtype=np.int32).reshape(-1, 2)
+        if(shape is None):
+            shape = tuple((self.coordinates.max(axis=0) + 1).tolist()) if len(self.coordinates) > 0 else (0, 0)
+        self.shape = tuple(shape)
+
+        self.ravel_positions = self.coordinates[:, 0].astype(np.int64) * self.shape[1] + self.coordinates[:, 1]
+
+        # nodes from create_csr_graph() are in row-major order already, so sorting is only needed for other coordinate lists
+        if(np.all(self.ravel_positions[1:] > self.ravel_positions[:-1])):
+            self.sorter = None
+        else:
+            self.sorter = np.argsort(self.ravel_positions, kind="stable")
+            self.ravel_positions = self.ravel_positions[self.sorter]
+
+    @classmethod
+    def from_skeleton(cls, skeleton: np.ndarray):
+        """
+        Build the index for every True/1 pixel of a skeleton, numbered in row-major order like create_csr_graph().
+        """
+        return cls(np.argwhere(skeleton), skeleton.shape)
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    def locations(self, nodes) -> np.ndarray:
+        """
+        Return the [x, y] location of every node in nodes, as an int32 array of shape (len(nodes), 2).
+        """
+        return self.coordinates[np.asarray(nodes, dtype=np.int64)]
+
+    def nodes(self, locations) -> np.ndarray:
+        """
+        Return the node id at every [x, y] location in locations (an array of shape (k, 2)), -1 where there is no node.
+        """
+        locations = np.asarray(locations, dtype=np.int64).reshape(-1, 2)
+        inside = ((locations >= 0) & (locations < np.array(self.shape))).all(axis=1)
+        ravel_positions = np.where(inside, locations[:, 0] * self.shape[1] + locations[:, 1], -1)
+
+        if(len(self) == 0):
+            return np.full(len(locations), -1, dtype=np.int64)
+
+        positions = np.minimum(np.searchsorted(self.ravel_positions, ravel_positions), len(self) - 1)
+        found = inside & (self.ravel_positions[positions] == ravel_positions)
+        nodes = positions if self.sorter is None else self.sorter[positions]
+
+        return np.where(found, nodes, -1)
+
+    def location(self, node: int) -> list:
+        """
+        Return the location of one node as an [x, y] list, like the values of search_by_node.
+        """
+        x, y = self.coordinates[node]
+        return [np.int64(x), np.int64(y)]
+
+    @property
+    def search_by_node(self):
+        return SearchByNodeView(self)
+
+    @property
+    def search_by_location(self):
+        return SearchByLocationView(self)
+
+    @property
+    def coordinates_list(self):
+        return CoordinatesListView(self)
+
+
+class SearchByNodeView(Mapping):
+    """
+    A read-only dictionary view of a NodeIndex, with node ids as keys and [x, y] lists as values, like the
+    search_by_node dictionary from get_node_locations().
+    """
+    def __init__(self, node_index: NodeIndex):
+        self.node_index = node_index
+
+    def __getitem__(self, node):
+        if(not isinstance(node, (int, np.integer)) or node < 0 or node >= len(self.node_index)):
+            raise KeyError(node)
+        return self.node_index.location(node)
+
+    def __iter__(self):
+        return iter(range(len(self.node_index)))
+
+    def __len__(self):
+        return len(self.node_index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SearchByLocationView(Mapping):
+    """
+    A read-only dictionary view of a NodeIndex, with locations as keys and node ids as values, like the search_by_location
+    dictionary from get_node_locations(). Keys are the str() of an [x, y] list like before, e.g. "[np.int64(5), np.int64(7)]"
+    or "[5, 7]", but (x, y) tuples and lists are accepted too.
+    """
+    def __init__(self, node_index: NodeIndex):
+        self.node_index = node_index
+
+    def __getitem__(self, location):
+        if(isinstance(location, str)):
+            # "[np.int64(5), np.int64(7)]" from numpy 2, "[5, 7]" from numpy 1
+            numbers = re.findall(r"\((-?\d+)\)", location) if "(" in location else re.findall(r"-?\d+", location)
+            if(len(numbers) != 2):
+                raise KeyError(location)
+            location = [int(number) for number in numbers]
+
+        node = int(self.node_index.nodes([location])[0])
+        if(node < 0):
+            raise KeyError(location)
+        return node
+
+    def __iter__(self):
+        for node in range(len(self.node_index)):
+            yield str(self.node_index.location(node))
+
+    def __len__(self):
+        return len(self.node_index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CoordinatesListView(Sequence):
+    """
+    A read-only list view of a NodeIndex, with the [x, y] list of each node, like the list returned by create_skeleton_graph().
+    np.asarray() on it returns a read-only view of the int32 coordinate array without copying, np.array() returns a copy.
+    """
+    def __init__(self, node_index: NodeIndex):
+        self.node_index = node_index
+
+    def __getitem__(self, idx):
+        if(isinstance(idx, slice)):
+            return [self.node_index.location(node) for node in range(len(self.node_index))[idx]]
+        if(idx < 0):
+            idx += len(self.node_index)
+        if(idx < 0 or idx >= len(self.node_index)):
+            raise IndexError("list index out of range")
+        return self.node_index.location(idx)
+
+    def __len__(self):
+        return len(self.node_index)
+
+    def __eq__(self, other):
+        return isinstance(other, (list, Sequence)) and len(other) == len(self) and list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __array__(self, dtype=None, copy=None):
+        coordinates = self.node_index.coordinates
+        if(dtype is not None and np.dtype(dtype) != coordinates.dtype):
+            if(copy is False):
+                raise ValueError(f"Unable to avoid a copy while converting the coordinates to {np.dtype(dtype)}")
+            return coordinates.astype(dtype)
+        if(copy):
+            return coordinates.copy()
+
+        # without a copy, the NodeIndex must not be changed through the returned array
+        coordinates = coordinates.view()
+        coordinates.flags.writeable = False
+        return coordinates
@@ -0,0 +1,191 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import glob
+import os
+import zipfile
+
+import numpy as np
+
+import imageio.v3 as iio
+from skimage.color import rgb2gray
+
+import rasterio
+from rasterio.io import MemoryFile
+
+
+# file extensions we know how to decode, rasterio is used for TIFF files (first band only, like open_tiff()),
+# imageio (installed with scikit-image) for everything else
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff")
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+
+def decode_image(source, name: str, as_gray: bool = False) -> np.ndarray:
+    """
+    Decode one image, either from a file on disk or from the raw bytes of a file (e.g. a member of a zip archive).
+
+    Parameters:
+        source: a path to an image file, or the bytes of an image file
+
+        name: the file name, used to pick a decoder from its extension
+
+        as_gray: whether to convert color images (RGB or RGBA) to a 2D grayscale image with values between 0 and 1
+
+    Returns:
+        image: the decoded image as an array
+    """
+    extension = os.path.splitext(name)[1].lower()
+
+    if(extension in TIFF_EXTENSIONS):
+        if(isinstance(source, bytes)):
+            with MemoryFile(source) as memory_file:
+                with memory_file.open() as dataset:
+                    image = dataset.read(dataset.indexes[0])
+        else:
+            with rasterio.open(source) as dataset:
+                image = dataset.read(dataset.indexes[0])
+    else:
+        image = iio.imread(source, extension=extension)
+
+    if(as_gray and image.ndim == 3):
+        # drop the alpha channel, if there is one
+        image = rgb2gray(image[..., :3])
+
+    return image
+
+
+def iter_decoded_batches(items, as_gray: bool = False, batch_size: int = 32, workers: int = 4, prefetch: int = 2):
+    """
+    Decode images on a pool of threads and yield them in batches, in the same order as items.
+
+    Up to prefetch batches are decoded ahead of the batch being yielded, so while the caller is busy with one batch
+    (e.g. running the CPU-bound graph stage of TGGLinesPlus() on it), the next ones are already being read and decoded.
+    Image decoders release the GIL, so threads are enough here.
+
+    Parameters:
+        items: an iterable of (name, source) pairs, where source is anything decode_image() accepts
+
+        as_gray: passed on to decode_image()
+
+        batch_size: the number of images in each batch (the last batch can be smaller)
+
+        workers: the number of decoding threads
+
+        prefetch: the number of batches to decode ahead of the one being yielded
+
+    Returns:
+        a generator of lists of (name, image) pairs
+    """
+    max_pending = max(1, prefetch) * batch_size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        batch = []
+        try:
+            for name, source in items:
+                pending.append((name, executor.submit(decode_image, source, name, as_gray)))
+                if(len(pending) < max_pending):
+                    continue
+
+                name, future = pending.popleft()
+                batch.append((name, future.result()))
+                if(len(batch) == batch_size):
+                    yield batch
+                    batch = []
+
+            while(pending):
+                name, future = pending.popleft()
+                batch.append((name, future.result()))
+                if(len(batch) == batch_size):
+                    yield batch
+                    batch = []
+
+            if(len(batch) > 0):
+                yield batch
+        finally:
+            # if the caller stops early, do not decode images nobody will read
+            for name, future in pending:
+                future.cancel()
+
+
+def iter_zip_images(zip_path: str, pattern: str = "*", as_gray: bool = False, batch_size: int = 32, workers: int = 4, prefetch: int = 2):
+    """
+    Stream images straight out of a zip archive without unpacking it, yielding batches of (name, image) pairs.
+    Members are read from the archive one at a time in this thread, and decoded on a pool of threads (see iter_decoded_batches()).
+
+    Example:
+        for batch in iter_zip_images("../data/chinese_mnist.zip", pattern="*.jpg"):
+            for name, image in batch:
+                ...
+
+    Parameters:
+        zip_path: the location of the zip archive
+
+        pattern: a glob-style pattern that member names must match, e.g. "*.png"
+
+        as_gray, batch_size, workers, prefetch: see iter_decoded_batches()
+
+    Returns:
+        a generator of lists of (name, image) pairs, in the order the members are stored in the archive
+    """
+    with zipfile.ZipFile(zip_path) as zip_file:
+        member_names = [member.filename for member in zip_file.infolist()
+                        if not member.is_dir()
+                        and fnmatch.fnmatch(member.filename, pattern)
+                        and os.path.splitext(member.filename)[1].lower() in IMAGE_EXTENSIONS]
+
+        # a generator, so each member is only read from the archive when the decoding threads have room for it
+        items = ((name, zip_file.read(name)) for name in member_names)
+
+        yield from iter_decoded_batches(items, as_gray=as_gray, batch_size=batch_size, workers=workers, prefetch=prefetch)
+
+
+def iter_directory_images(pattern: str, as_gray: bool = False, batch_size: int = 32, workers: int = 4, prefetch: int = 2):
+    """
+    Stream images from the files matching a glob pattern, yielding batches of (name, image) pairs.
+    Files are read and decoded on a pool of threads (see iter_decoded_batches()).
+
+    Example:
+        for batch in iter_directory_images("../data/rs_imagery/*.png", as_gray=True):
+            for name, image in batch:
+                ...
+
+    Parameters:
+        pattern: a glob pattern for the image files, e.g. "../data/rs_imagery/*.png" or "../data/**/*.tif"
+                 (** matches any number of folders)
+
+        as_gray, batch_size, workers, prefetch: see iter_decoded_batches()
+
+    Returns:
+        a generator of lists of (name, image) pairs, sorted by file name
+    """
+    file_names = sorted([file_name for file_name in glob.glob(pattern, recursive=True)
+                         if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS])
+    items = ((file_name, file_name) for file_name in file_names)
+
+    yield from iter_decoded_batches(items, as_gray=as_gray, batch_size=batch_size, workers=workers, prefetch=prefetch)
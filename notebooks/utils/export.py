@@ -0,0 +1,234 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+import csv
+import json
+import os
+
+import numpy as np
+
+import rasterio
+from rasterio.transform import Affine
+
+
+# output formats, picked from the file extension by PathWriter
+VECTOR_DRIVERS = {
+    ".geojsonl": "GeoJSONSeq",
+    ".geojsons": "GeoJSONSeq",
+    ".geojsonseq": "GeoJSONSeq",
+    ".gpkg": "GPKG",
+    ".csv": "CSV",
+}
+
+
+def read_georeference(path: str):
+    """
+    Read the affine transform (pixel --> map coordinates) and coordinate reference system of a raster file.
+
+    Parameters:
+        path: the location of a TIFF file, e.g. the one the skeleton was made from
+
+    Returns:
+        transform: a rasterio Affine transform
+
+        crs: a rasterio CRS, or None if the file has none
+    """
+    with rasterio.open(path) as dataset:
+        return dataset.transform, dataset.crs
+
+
+def paths_to_world(paths: list, transform: Affine = None, coordinates: np.ndarray = None, padding: int = 1):
+    """
+    Convert a list of paths to map coordinates, all paths at once, instead of looking up search_by_node one node at a time.
+    Each node is placed at the center of its pixel.
+
+    Parameters:
+        paths: a list of paths, each a list of node ids (if coordinates is given), or of [row, col] locations
+               in the skeleton (like the paths of TGGLinesPlus_tiled())
+
+        transform: the affine transform of the source image (see read_georeference()), defaults to pixel coordinates
+
+        coordinates: an array of shape (N, 2) with the [row, col] location of every node, e.g.
+                     np.asarray(result_dict["skeleton_coordinates"])
+
+        padding: the padding create_skeleton() added around the image, which is taken off before converting
+
+    Returns:
+        points: a float64 array of shape (M, 2) with the [x, y] map coordinates of every node of every path
+
+        offsets: an array of length len(paths) + 1, where the points of path i are points[offsets[i]:offsets[i+1]]
+    """
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum([len(path) for path in paths], out=offsets[1:])
+
+    if(len(paths) == 0):
+        return np.zeros((0, 2)), offsets
+
+    if(coordinates is None):
+        locations = np.concatenate([np.asarray(path, dtype=np.int64).reshape(-1, 2) for path in paths])
+    else:
+        locations = np.asarray(coordinates)[np.concatenate([np.asarray(path, dtype=np.int64) for path in paths])]
+
+    rows = locations[:, 0] - padding + 0.5
+    cols = locations[:, 1] - padding + 0.5
+
+    if(transform is None):
+        transform = Affine.identity()
+    points = np.stack([transform.a * cols + transform.b * rows + transform.c,
+                       transform.d * cols + transform.e * rows + transform.f], axis=1)
+
+    return points, offsets
+
+
+class PathWriter:
+    """
+    Write paths as LineStrings to a vector file, batch by batch, so that memory use does not depend on how many paths
+    a scene produces: paths can be written as soon as they are found (e.g. for each result of TGGLinesPlus_batch(),
+    or each subgraph in result_dict["subgraphs_list"]), and only one batch is converted at a time.
+
+    The format is picked from the file extension:
+    - .geojsonl / .geojsons / .geojsonseq: newline-delimited GeoJSON features (GeoJSON text sequence)
+    - .gpkg: GeoPackage, written with fiona (which needs to be installed)
+    - .csv: one row per path, with the geometry as WKT
+
+    Every feature has a path_id (counting up from 0 across all write() calls) and its number of nodes, num_nodes.
+
+    Example:
+        transform, crs = read_georeference("../data/mass_roads/11278840_15.tif")
+        with PathWriter("roads.gpkg", transform, crs) as writer:
+            writer.write(result_dict["paths_list"], coordinates=np.asarray(result_dict["skeleton_coordinates"]))
+
+    Parameters:
+        filename: the location of the output file
+
+        transform: the affine transform of the source image, see paths_to_world()
+
+        crs: the coordinate reference system of the source image, only stored in GeoPackage files
+
+        padding: see paths_to_world()
+
+        batch_size: the number of paths converted and written at once
+    """
+    def __init__(self, filename: str, transform: Affine = None, crs = None, padding: int = 1, batch_size: int = 10000):
+        extension = os.path.splitext(filename)[1].lower()
+        if(extension not in VECTOR_DRIVERS):
+            raise ValueError(f"Unknown vector format '{extension}', expected one of {list(VECTOR_DRIVERS)}")
+
+        self.driver = VECTOR_DRIVERS[extension]
+        self.transform = transform
+        self.padding = padding
+        self.batch_size = batch_size
+        self.num_paths = 0
+
+        if(self.driver == "GPKG"):
+            try:
+                import fiona
+            except ImportError:
+                raise ImportError("Writing GeoPackage files needs fiona, install it with 'conda install -c conda-forge fiona'")
+
+            schema = {"geometry": "LineString", "properties": {"path_id": "int", "num_nodes": "int"}}
+            self.file = fiona.open(filename, "w", driver="GPKG", schema=schema, crs=crs.to_wkt() if crs is not None else None)
+        else:
+            self.file = open(filename, "w", newline="")
+            if(self.driver == "CSV"):
+                self.csv_writer = csv.writer(self.file)
+                self.csv_writer.writerow(["path_id", "num_nodes", "WKT"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def write(self, paths, coordinates: np.ndarray = None):
+        """
+        Convert paths to map coordinates and write them.
+
+        Parameters:
+            paths: any iterable of paths, see paths_to_world()
+
+            coordinates: see paths_to_world()
+        """
+        batch = []
+        for path in paths:
+            batch.append(path)
+            if(len(batch) == self.batch_size):
+                self.write_batch(batch, coordinates)
+                batch = []
+
+        if(len(batch) > 0):
+            self.write_batch(batch, coordinates)
+
+    def write_batch(self, paths: list, coordinates: np.ndarray = None):
+        points, offsets = paths_to_world(paths, self.transform, coordinates, self.padding)
+        points = points.tolist()
+
+        for idx in range(len(paths)):
+            path_id = self.num_paths + idx
+            line = points[offsets[idx]:offsets[idx + 1]]
+
+            if(self.driver == "GeoJSONSeq"):
+                feature = {"type": "Feature", "properties": {"path_id": path_id, "num_nodes": len(line)},
+                           "geometry": {"type": "LineString", "coordinates": line}}
+                self.file.write(json.dumps(feature) + "\n")
+            elif(self.driver == "CSV"):
+                wkt = "LINESTRING (" + ", ".join([f"{x!r} {y!r}" for (x, y) in line]) + ")"
+                self.csv_writer.writerow([path_id, len(line), wkt])
+            else:
+                self.file.write({"geometry": {"type": "LineString", "coordinates": line},
+                                 "properties": {"path_id": path_id, "num_nodes": len(line)}})
+
+        self.num_paths += len(paths)
+
+
+def export_paths(result_dict: dict, filename: str, source: str = None, **kwargs) -> int:
+    """
+    Write the paths of a TGGLinesPlus() or TGGLinesPlus_tiled() result to a vector file, in the order of its paths_list,
+    see PathWriter. The subgraphs are not used, so a lazy result (TGGLinesPlusResult) does not build them.
+
+    Parameters:
+        result_dict: the dictionary returned by TGGLinesPlus() or TGGLinesPlus_tiled()
+
+        filename: the location of the output file, its extension picks the format
+
+        source: optional location of the TIFF file the skeleton was made from, to write map coordinates instead of pixel coordinates
+
+        kwargs: passed on to PathWriter, e.g. batch_size
+
+    Returns:
+        num_paths: the number of paths written
+    """
+    transform, crs = read_georeference(source) if source is not None else (None, None)
+
+    # TGGLinesPlus_tiled() paths are lists of locations, TGGLinesPlus() paths are lists of node ids
+    coordinates = np.asarray(result_dict["skeleton_coordinates"]) if "skeleton_coordinates" in result_dict else None
+    with PathWriter(filename, transform, crs, **kwargs) as writer:
+        writer.write(result_dict["paths_list"], coordinates)
+
+    return writer.num_paths
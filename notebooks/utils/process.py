@@ -23,15 +23,24 @@
 #---------------------------------------------------------------------------
 
 
-from collections import Counter
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 import csv
+import functools
+import io
 import itertools
+import os
 import timeit
+import zipfile
 
 import numpy as np
 
-from skimage.filters import threshold_mean
-from skimage.morphology import skeletonize
+from scipy import ndimage, sparse
+from scipy.sparse import csgraph
+from skimage.filters import threshold_local, threshold_mean, threshold_otsu
+from skimage.morphology import medial_axis, skeletonize, thin
 from skimage import graph as skgraph
 
 import networkx as nx
@@ -39,11 +48,16 @@ import networkx as nx
 nxGraph = nx.classes.graph.Graph
 
 import rasterio
+from rasterio.windows import Window
+
+from utils.csr_graph import CSRGraph, CoordinatesListView, NodeIndex, create_csr_graph, find_csr_components
+from utils.raster import WindowedTiffReader, iter_tile_windows
 
 
 def read_in_mnist(filename: str):
     """
     Returns the original MNIST dataset with lists for dataset images and corresponding labels.
+    The CSV file is parsed in bulk with load_mnist(), so each image in images_list is a view into one contiguous array.
         
     Parameters:
         filename: the location of the MNIST CSV file
@@ -53,30 +67,83 @@ def read_in_mnist(filename: str):
 
         labels_list: a list of digit labels (integers), corresponding to each image in images_list
     """
+    images, labels = load_mnist(filename, cache=False)
+    images_list = list(images)
+    labels_list = labels.tolist()
+
+    return images_list, labels_list
+
+
+def load_mnist(filename: str, cache: bool = True):
+    """
+    Returns the original MNIST dataset as one contiguous (N, 28, 28) uint8 array of images and an array of labels.
+
+    The CSV file is parsed in bulk with np.loadtxt() rather than row by row. If cache is True, the arrays are saved as
+    .npy files next to the CSV file (e.g. mnist_train.images.npy and mnist_train.labels.npy for mnist_train.csv),
+    and later calls memory-map those files instead of parsing the CSV again, which makes them almost instant.
+    The cache is rebuilt whenever the CSV file is newer than it.
+
+    Parameters:
+        filename: the location of the MNIST CSV file, with or without a header row
+
+        cache: whether to read from and write to the .npy cache next to the CSV file
+
+    Returns:
+        images: an (N, 28, 28) uint8 array, memory-mapped (read-only) when it comes from the cache
+
+        labels: an (N,) uint8 array of digit labels, corresponding to each image in images
+    """
+    cache_prefix = os.path.splitext(filename)[0]
+    images_cache = cache_prefix + ".images.npy"
+    labels_cache = cache_prefix + ".labels.npy"
+
+    if(cache and os.path.isfile(images_cache) and os.path.isfile(labels_cache)
+       and os.path.getmtime(images_cache) >= os.path.getmtime(filename) and os.path.getmtime(labels_cache) >= os.path.getmtime(filename)):
+        return np.load(images_cache, mmap_mode="r"), np.load(labels_cache, mmap_mode="r")
+
+    # some versions of the MNIST CSV files start with a header row (label, 1x1, 1x2, ...)
     with open(filename, 'r') as csv_file:
-        images_list = []
-        labels_list = []
+        first_value = csv_file.readline().split(",")[0].strip()
+    header_rows = 0 if first_value.isdigit() else 1
 
-        fileObject =  csv.reader(csv_file)
-                
-        for data in fileObject:
-            # the first column is the label
-            label = data[0]
-            labels_list.append(int(label))
-            
-            # the rest of columns are pixels
-            digit_img = data[1:]
+    # the first column is the label, the other 784 columns are the pixels of a 28 x 28 image
+    data = np.loadtxt(filename, delimiter=",", dtype=np.uint8, skiprows=header_rows, ndmin=2)
+    labels = np.ascontiguousarray(data[:, 0])
+    images = np.ascontiguousarray(data[:, 1:]).reshape((-1, 28, 28))
 
-            # make those columns into a array of 8-bits pixels
-            # this array will be of 1D with length 784
-            # the pixel intensity values are integers from 0 to 255
-            digit_img = np.array(digit_img, dtype='uint8')
+    if(cache):
+        # write to temporary files first, so an interrupted run never leaves a broken cache behind
+        for array, cache_file in [(images, images_cache), (labels, labels_cache)]:
+            temp_file = cache_file + ".tmp"
+            with open(temp_file, "wb") as npy_file:
+                np.save(npy_file, array)
+            os.replace(temp_file, cache_file)
 
-            # reshape the array into 28 x 28 array (2-dimensional array)
-            digit_img = digit_img.reshape((28, 28))
-            images_list.append(digit_img)
+    return images, labels
 
-    return images_list, labels_list
+
+@contextmanager
+def open_csv(filename: str):
+    """
+    Open a CSV file for reading, either a plain CSV file or the first CSV file inside of a zip archive,
+    which is streamed straight out of the archive without unpacking it.
+
+    Parameters:
+        filename: the location of a .csv file, or of a .zip file containing one
+
+    Returns:
+        csv_file: an open text file object, to be used in a with statement
+    """
+    if(filename.lower().endswith(".zip")):
+        with zipfile.ZipFile(filename) as zip_file:
+            csv_names = [name for name in zip_file.namelist() if name.lower().endswith(".csv")]
+            if(len(csv_names) == 0):
+                raise ValueError(f"No CSV file found in {filename}")
+            with io.TextIOWrapper(zip_file.open(csv_names[0]), encoding="utf-8") as csv_file:
+                yield csv_file
+    else:
+        with open(filename, 'r') as csv_file:
+            yield csv_file
 
 
 def read_in_chinese_mnist(filename: str):
@@ -84,14 +151,14 @@ def read_in_chinese_mnist(filename: str):
     Returns the compact CSV version of the Chinese MNIST dataset with lists for dataset images and corresponding labels.
         
     Parameters:
-        filename: the location of the Chinese MNIST CSV file
+        filename: the location of the Chinese MNIST CSV file, or of the zip file it ships in (see open_csv())
     
     Returns:
         images_list: list of a numpy array for each image in the MNIST dataset
 
         labels_list: a list of digit labels (integers), corresponding to each image in images_list
     """
-    with open(filename, 'r') as csv_file:
+    with open_csv(filename) as csv_file:
             images_list = []
             labels_list = []
             digit_labels_list = []
@@ -126,19 +193,28 @@ def read_in_chinese_mnist(filename: str):
     return images_list, labels_list, digit_labels_list
 
 
-def open_tiff(path: str) -> np.ndarray:
+def open_tiff(path: str, band: int = None, window: Window = None, overview_level: int = None) -> np.ndarray:
     """
-    Open a
+    Open a TIFF file and read one band of it, optionally only a window of it or from one of its overviews.
+    For images too large to read at once, see WindowedTiffReader in utils/raster.py.
     
     Parameters:
         path: the full name / location of the TIFF file
+
+        band: the (1-based) index of the band to read, defaults to the first band
+
+        window: optional rasterio Window to read instead of the whole band
+
+        overview_level: optional index of the overview to read from, 0 being the largest overview
     
     Returns:
         array: the array extracted from the input TIFF file
     """
-    with rasterio.open(path) as dataset:
+    open_kwargs = {} if overview_level is None else {"overview_level": overview_level}
+
+    with rasterio.open(path, **open_kwargs) as dataset:
         
-        array = dataset.read(dataset.indexes[0])
+        array = dataset.read(dataset.indexes[0] if band is None else band, window=window)
     
     return array
 
@@ -191,20 +267,145 @@ def pad_image(image: np.ndarray) -> np.ndarray:
     return np.pad(image, 1)
 
 
-def create_skeleton(binary: np.ndarray) -> np.ndarray:
+# the skeletonization methods create_skeleton() can use, "zhang" is what skeletonize() uses for 2D images by default
+SKELETON_METHODS = {
+    "zhang": functools.partial(skeletonize, method="zhang"),
+    "lee": functools.partial(skeletonize, method="lee"),
+    "thin": thin,
+    # medial_axis() breaks ties at random, a fixed seed gives the same skeleton every time
+    "medial_axis": functools.partial(medial_axis, rng=0),
+}
+
+
+def create_skeleton(binary: np.ndarray, method: str = "zhang", out: np.ndarray = None) -> np.ndarray:
     """
     Given an input image binary, skeletonize it, pad it, and return the result.
 
     Parameters:
         binary: an array representing an image bianry
+
+        method: the skeletonization method, one of SKELETON_METHODS: "zhang" (default), "lee", "thin" or "medial_axis"
+
+        out: optional boolean array of shape (height + 2, width + 2) to write the padded skeleton into,
+             instead of allocating a new padded array
     
     Returns:
-        skeleton: an array representing an image skeleton
+        skeleton: an array representing an image skeleton (out, if it is given)
+    """
+    if(method not in SKELETON_METHODS):
+        raise ValueError(f"Unknown skeletonization method '{method}', expected one of {list(SKELETON_METHODS)}")
+
+    skeleton = SKELETON_METHODS[method](binary)
+    if(out is None):
+        return pad_image(skeleton)
+
+    out[0, :] = out[-1, :] = out[:, 0] = out[:, -1] = 0
+    out[1:-1, 1:-1] = skeleton
+    
+    return out
+
+
+def skeletonize_chunk(binaries: np.ndarray, method: str) -> np.ndarray:
+    """
+    Skeletonize a stack of binaries without padding them, this is what each worker process runs in create_skeletons().
     """
-    skeleton = skeletonize(binary)
-    skeleton = pad_image(skeleton)
+    return np.stack([SKELETON_METHODS[method](binary) for binary in binaries])
+
+
+def create_skeletons(binaries, method: str = "zhang", workers: int = 1, chunk_size: int = 16, out: np.ndarray = None) -> np.ndarray:
+    """
+    Skeletonize and pad a stack of binaries of the same size, like create_skeleton() does for one binary, writing every
+    padded skeleton into one preallocated (N, height + 2, width + 2) array instead of allocating a new array per image.
+
+    Parameters:
+        binaries: an (N, height, width) array, or a list of binaries of the same size
+
+        method: the skeletonization method, see create_skeleton()
+
+        workers: the number of worker processes, None uses every CPU, 1 (default) runs everything in this process without a pool
+
+        chunk_size: the number of binaries sent to a worker at once
+
+        out: optional boolean array of shape (N, height + 2, width + 2) to write the skeletons into
     
-    return skeleton
+    Returns:
+        skeletons: an (N, height + 2, width + 2) boolean array of skeletons (out, if it is given)
+    """
+    if(method not in SKELETON_METHODS):
+        raise ValueError(f"Unknown skeletonization method '{method}', expected one of {list(SKELETON_METHODS)}")
+
+    binaries = np.asarray(binaries)
+    num_binaries, height, width = binaries.shape
+    if(out is None):
+        out = np.zeros((num_binaries, height + 2, width + 2), dtype=bool)
+    elif(out.shape != (num_binaries, height + 2, width + 2)):
+        raise ValueError(f"out has shape {out.shape}, expected {(num_binaries, height + 2, width + 2)}")
+
+    if(workers == 1):
+        for idx in range(num_binaries):
+            create_skeleton(binaries[idx], method, out=out[idx])
+        return out
+
+    # only the inside of out is written by the workers' results, so the padding is set once for the whole stack
+    out[:, 0, :] = out[:, -1, :] = out[:, :, 0] = out[:, :, -1] = 0
+    chunk_starts = range(0, num_binaries, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk_skeletons = executor.map(skeletonize_chunk, [binaries[start:start+chunk_size] for start in chunk_starts],
+                                       itertools.repeat(method))
+        for start, skeletons in zip(chunk_starts, chunk_skeletons):
+            out[start:start+len(skeletons), 1:-1, 1:-1] = skeletons
+
+    return out
+
+
+def filter_speckle(skeleton: np.ndarray, min_pixels: int = None, min_extent: int = None):
+    """
+    Remove small connected components ("speckle") from a skeleton before its graph is built, using labelled-array
+    operations on the raster instead of building a graph and a subgraph for each of them.
+
+    Components are labelled with 8-connectivity, the same as the pixel graph built by create_skeleton_graph(skeleton, connectivity=2).
+    A component is removed if it has fewer than min_pixels pixels, or if its bounding box is less than min_extent pixels
+    tall and less than min_extent pixels wide.
+
+    Parameters:
+        skeleton: an array representing an image skeleton
+
+        min_pixels: the minimum number of pixels in a component to keep it, None does not filter by size
+
+        min_extent: the minimum height or width of a component's bounding box to keep it, None does not filter by extent
+
+    Returns:
+        filtered_skeleton: a copy of skeleton without the removed components
+
+        speckle_pixels: a list with one list of [x, y] coordinate pairs (like skeleton_coordinates) per removed component,
+                        components are listed in order of their first pixel, top to bottom, left to right
+    """
+    labels, num_labels = ndimage.label(skeleton, structure=np.ones((3, 3), dtype=bool))
+    component_sizes = np.bincount(labels.ravel(), minlength=num_labels + 1)
+
+    remove = np.zeros(num_labels + 1, dtype=bool)
+    if(min_pixels is not None):
+        remove |= component_sizes < min_pixels
+    if(min_extent is not None and num_labels > 0):
+        extents = np.array([max(rows.stop - rows.start, cols.stop - cols.start) for rows, cols in ndimage.find_objects(labels)])
+        remove[1:] |= extents < min_extent
+
+    # label 0 is the background
+    remove[0] = False
+    if(not remove.any()):
+        return skeleton.copy(), []
+
+    removed_mask = remove[labels]
+    filtered_skeleton = skeleton.copy()
+    filtered_skeleton[removed_mask] = 0
+
+    # group the removed pixels by component, components are labelled in order of their first pixel
+    rows, cols = np.nonzero(removed_mask)
+    order = np.argsort(labels[rows, cols], kind="stable")
+    removed_coordinates = np.stack([rows[order], cols[order]], axis=1)
+    speckle_pixels = [component.tolist() for component in np.split(removed_coordinates, np.cumsum(component_sizes[remove])[:-1])]
+
+    return filtered_skeleton, speckle_pixels
 
 
 def create_skeleton_graph(skeleton: np.ndarray, connectivity: int = 1):
@@ -223,8 +424,9 @@ def create_skeleton_graph(skeleton: np.ndarray, connectivity: int = 1):
     img_shape = skeleton.shape
     skeleton_graph, ravel_positions = skgraph.pixel_graph(skeleton, connectivity=connectivity)
     
+    # the coordinates are kept in a NodeIndex array, the list is a read-only view of it (np.asarray() gives the array)
     x_pos, y_pos = np.unravel_index(ravel_positions, img_shape)
-    skeleton_coords = [[x_pos[i], y_pos[i]] for i in range(len(x_pos))]
+    skeleton_coords = NodeIndex(np.stack([x_pos, y_pos], axis=1), img_shape).coordinates_list
     
     return skeleton_graph, skeleton_coords
 
@@ -252,10 +454,13 @@ def get_node_locations(coordinates_list: list):
     node locations as keys and nodes as values. This is useful because we can look to see if a 
     given pixel in an image is a node in our network, but also determine where nodes are located
     in an image by their position in a network.
+
+    Both are read-only views of one array-backed NodeIndex (see utils/csr_graph.py), use their node_index attribute
+    for vectorized lookups of many nodes or locations at once.
     
     Parameters:
         coordinates_list: a list containing (x, y) coordinate pairs of the location for each node
-                          in a skeleton graph
+                          in a skeleton graph, or the view returned by create_skeleton_graph()
     
     Returns:
         search_by_node: a dictionary with nodes as keys and coordinates as values
@@ -263,19 +468,12 @@ def get_node_locations(coordinates_list: list):
         search_by_location: a reverse lookup dictionary with coordinates as keys and nodes as values
     
     """
-    search_by_node = {}
+    if(isinstance(coordinates_list, CoordinatesListView)):
+        node_index = coordinates_list.node_index
+    else:
+        node_index = NodeIndex(np.asarray(coordinates_list))
 
-    # create dict where node is key, location is value
-    for i, node_location in enumerate(coordinates_list):
-        #node_locations[str(node_location)] = i
-        search_by_node[i] = node_location
-        
-    # create reverse lookup dict where location is key, node is value
-    dict_items_list = list(search_by_node.items())
-    key_values_flipped = [(str(v), k) for (k, v) in dict_items_list]
-    search_by_location = dict(key_values_flipped)
-    
-    return search_by_node, search_by_location
+    return node_index.search_by_node, node_index.search_by_location
 
 
 def find_junctions(graph: nxGraph, node_list: list):
@@ -443,6 +641,102 @@ def degree_to_node_type(degree: int) -> str:
     return node_type
 
 
+# integer codes for node types, NODE_TYPES[code] gives back the type string from degree_to_node_type()
+NODE_TYPES = np.array(["I", "E", "T", "J"])
+ISOLATED, END, TURNING, JUNCTION = 0, 1, 2, 3
+
+
+def find_node_degrees(skeleton: np.ndarray, removed_edges: list = None) -> np.ndarray:
+    """
+    Compute the 8-neighbor degree of every skeleton pixel at once with a 3x3 convolution over the skeleton,
+    instead of reading graph.degree() one node at a time. The returned array is aligned with node ids, i.e. with
+    the nodes of the graph from create_skeleton_graph(skeleton, connectivity=2), which are numbered in row-major pixel order.
+
+    Parameters:
+        skeleton: a boolean array representing an image skeleton, from create_skeleton()
+
+        removed_edges: optional list of (u, v) edges that were removed from the graph (e.g. diagonal edges in cliques),
+                       see update_node_degrees()
+
+    Returns:
+        degrees: an int32 array with the degree of each node
+    """
+    skeleton = skeleton.astype(bool)
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    kernel[1, 1] = 0
+
+    neighbor_counts = ndimage.convolve(skeleton.astype(np.uint8), kernel, mode="constant", cval=0)
+    degrees = neighbor_counts.ravel()[np.flatnonzero(skeleton)].astype(np.int32)
+
+    if(removed_edges is not None):
+        degrees = update_node_degrees(degrees, removed_edges, copy=False)
+
+    return degrees
+
+
+def update_node_degrees(degrees: np.ndarray, removed_edges: list, copy: bool = True) -> np.ndarray:
+    """
+    Recompute node degrees after edges have been removed from a graph, without walking the graph again:
+    each removed edge lowers the degree of both of its nodes by 1.
+
+    Parameters:
+        degrees: an int32 array with the degree of each node, from find_node_degrees()
+
+        removed_edges: a list (or (k, 2) array) of (u, v) edges removed from the graph
+
+        copy: whether to return an updated copy of degrees, or update degrees in place
+
+    Returns:
+        degrees: an int32 array with the updated degree of each node
+    """
+    if(copy):
+        degrees = degrees.copy()
+    np.subtract.at(degrees, np.asarray(removed_edges, dtype=np.int64).reshape(-1), 1)
+
+    return degrees
+
+
+def degrees_to_node_types(degrees: np.ndarray) -> np.ndarray:
+    """
+    The vectorized version of degree_to_node_type(): map an array of degrees to integer node type codes.
+    Use NODE_TYPES[codes] to get the J, T, E and I strings back.
+
+    Parameters:
+        degrees: an array of node degrees
+
+    Returns:
+        node_type_codes: an int8 array with ISOLATED (0), END (1), TURNING (2) or JUNCTION (3) for each node
+    """
+    if(np.any(degrees < 0)):
+        raise ValueError("Degree < 0 not allowed")
+
+    return np.minimum(degrees, JUNCTION).astype(np.int8)
+
+
+def find_junctions_from_degrees(degrees: np.ndarray, node_list: list):
+    """
+    The same as find_junctions(), but looks node degrees up in an array from find_node_degrees() instead of reading
+    them from a graph.
+
+    Parameters:
+        degrees: an array with the degree of every node, indexed by node id
+
+        node_list: a list of nodes
+
+    Returns:
+        node_types: a list of node types (J, T, E or I) for each node in node_list
+
+        junction_nodes: a list of junction nodes in node_list
+    """
+    node_array = np.asarray(node_list, dtype=np.int64)
+    node_type_codes = degrees_to_node_types(degrees[node_array])
+
+    node_types = NODE_TYPES[node_type_codes].tolist()
+    junction_nodes = node_array[node_type_codes == JUNCTION].tolist()
+
+    return node_types, junction_nodes
+
+
 def get_unique_cliques(graph: nxGraph, junction_locations: list):
         """
         Get cliques from a NetworkX subgraph built with the junction nodes in junctions_list
@@ -469,6 +763,304 @@ def get_unique_cliques(graph: nxGraph, junction_locations: list):
         return cliques, unique_cliques
 
 
+def find_window_cliques(skeleton: np.ndarray, degrees: np.ndarray):
+    """
+    Find the same unique cliques as get_unique_cliques() (the maximal cliques among junction nodes), and the diagonal edge
+    that find_removable_edges() removes from each 3 node clique, for a whole skeleton at once.
+
+    On an 8-connected skeleton, every clique fits inside a 2x2 pixel window, so instead of calling nx.find_cliques() for
+    every junction, we count the junction pixels in every 2x2 window of the skeleton:
+    - a window with 4 junctions is a 4 node clique
+    - a window with 3 junctions is a 3 node clique (a pixel triangle), whose diagonal edge is the one to remove
+    - two adjacent junctions are a 2 node clique, unless a window they share has 3+ junctions
+    - a junction with no neighboring junctions is a clique by itself
+
+    Parameters:
+        skeleton: a boolean array representing an image skeleton, from create_skeleton()
+
+        degrees: an array with the degree of every node, from find_node_degrees(skeleton)
+
+    Returns:
+        unique_cliques: a sorted list of cliques, each a sorted list of nodes
+
+        edges_to_remove: an int64 array of shape (k, 2), the diagonal (u, v) edge of each 3 node clique in unique_cliques,
+                         in the same order as the 3 node cliques appear in unique_cliques
+    """
+    skeleton = skeleton.astype(bool)
+
+    # node ids for every skeleton pixel (row-major order, like create_skeleton_graph()), -1 everywhere else
+    node_ids = np.full(skeleton.shape, -1, dtype=np.int64)
+    node_ids[skeleton] = np.arange(len(degrees))
+    junctions = np.zeros(skeleton.shape, dtype=bool)
+    junctions[skeleton] = degrees >= 3
+
+    # the four corners of every 2x2 window: top-left, top-right, bottom-left, bottom-right
+    corner_slices = [(slice(None, -1), slice(None, -1)), (slice(None, -1), slice(1, None)),
+                     (slice(1, None), slice(None, -1)), (slice(1, None), slice(1, None))]
+    corner_ids = np.stack([node_ids[corner] for corner in corner_slices], axis=-1)
+    corner_junctions = np.stack([junctions[corner] for corner in corner_slices], axis=-1)
+    window_counts = corner_junctions.sum(axis=-1)
+
+    # 4 node cliques: every corner of the window is a junction (corners are already in sorted order)
+    cliques_4 = corner_ids[window_counts == 4]
+
+    # 3 node cliques: drop the one corner that is not a junction, then sort the cliques like get_unique_cliques()
+    triangle_windows = window_counts == 3
+    cliques_3 = corner_ids[triangle_windows][corner_junctions[triangle_windows]].reshape(-1, 3)
+    missing_corner = np.argmin(corner_junctions[triangle_windows], axis=-1)
+    cliques_order = np.lexsort(cliques_3.T[::-1])
+    cliques_3 = cliques_3[cliques_order]
+    missing_corner = missing_corner[cliques_order]
+
+    # the diagonal edge of a triangle joins top-right and bottom-left if the missing corner is top-left or bottom-right,
+    # otherwise it joins top-left and bottom-right, these are the positions of those two nodes in the sorted clique
+    diagonal_positions = np.array([[0, 1], [0, 2], [0, 2], [1, 2]])[missing_corner]
+    edges_to_remove = np.take_along_axis(cliques_3, diagonal_positions, axis=1)
+
+    # 2 node cliques: adjacent junctions that do not share a window with 3+ junctions
+    # padding lets us shift every array by one pixel in any direction with plain slices
+    height, width = skeleton.shape
+    padded_ids = np.pad(node_ids, 1, constant_values=-1)
+    padded_junctions = np.pad(junctions, 1)
+    padded_big_windows = np.pad(window_counts >= 3, 1)
+    cliques_2 = []
+    # (row, col) offset of the second junction, and the offset(s) of the top-left corner of the windows holding both junctions
+    for (row_offset, col_offset), window_offsets in [((0, 1), [(-1, 0), (0, 0)]), ((1, 0), [(0, -1), (0, 0)]),
+                                                      ((1, 1), [(0, 0)]), ((1, -1), [(0, -1)])]:
+        neighbor = (slice(1 + row_offset, 1 + row_offset + height), slice(1 + col_offset, 1 + col_offset + width))
+        pairs = junctions & padded_junctions[neighbor]
+        for (window_row, window_col) in window_offsets:
+            pairs &= ~padded_big_windows[1 + window_row:1 + window_row + height, 1 + window_col:1 + window_col + width]
+        cliques_2.append(np.stack([node_ids[pairs], padded_ids[neighbor][pairs]], axis=-1))
+    cliques_2 = np.concatenate(cliques_2)
+
+    # 1 node cliques: junctions with no neighboring junctions
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    kernel[1, 1] = 0
+    neighboring_junctions = ndimage.convolve(junctions.astype(np.uint8), kernel, mode="constant", cval=0)
+    cliques_1 = node_ids[junctions & (neighboring_junctions == 0)].reshape(-1, 1)
+
+    unique_cliques = sorted(cliques_1.tolist() + cliques_2.tolist() + cliques_3.tolist() + cliques_4.tolist())
+
+    return unique_cliques, edges_to_remove
+
+
+def find_spur(graph: CSRGraph, degrees: np.ndarray, pruned: np.ndarray, end_node: int, spur_length: int):
+    """
+    Walk from an end node over turning nodes (degree 2) until the first junction, and return the branch if it has
+    fewer than spur_length nodes. Used by prune_spurs().
+
+    Parameters:
+        graph: a CSRGraph, with the clique edges already removed
+
+        degrees: the current degree of every node
+
+        pruned: a boolean array that is True for nodes that have already been pruned, which are skipped
+
+        end_node: the node (with degree 1) to start walking from
+
+        spur_length: the number of nodes (not counting the junction) a branch must have to be kept
+
+    Returns:
+        branch: the nodes of the branch from end_node up to (not including) the junction, or None if the branch is not short
+                enough, or ends at another end node instead of a junction (then it is a whole line, not a spur)
+
+        junction: the junction node at the end of the branch, or None
+    """
+    branch = []
+    previous_node, current_node = -1, end_node
+
+    while(len(branch) < spur_length - 1):
+        branch.append(current_node)
+        next_nodes = [node for node in graph[current_node] if node != previous_node and not pruned[node]]
+        if(len(next_nodes) == 0 or degrees[next_nodes[0]] == 1):
+            return None, None
+        if(degrees[next_nodes[0]] >= 3):
+            return branch, next_nodes[0]
+        previous_node, current_node = current_node, next_nodes[0]
+
+    return None, None
+
+
+def prune_spurs(graph: CSRGraph, degrees: np.ndarray, spur_length: int):
+    """
+    Iteratively remove terminal branches (an end node, then turning nodes, up to a junction) that have fewer than spur_length
+    nodes. These short spurs are common on skeletons of thick lines like roads and cracks, and each one adds a junction and
+    an end node to the path segmentation points and splits a line into extra paths.
+
+    A spur is pruned by removing its edges, so its nodes are left isolated (degree 0) and are not part of any path.
+    Spurs are pruned shortest first, and never below degree 2 at their junction, so a small "Y" shape keeps its longest
+    branch instead of shrinking to a single pixel. When a junction drops to degree 2, the short branches that were kept
+    there get walked again, since they now continue past it to the next junction; nothing else is walked twice.
+
+    Parameters:
+        graph: a CSRGraph, with the clique edges already removed (see CSRGraph.remove_edges())
+
+        degrees: the degree of every node in graph, from update_node_degrees()
+
+        spur_length: terminal branches with fewer nodes than this (not counting their junction) are pruned
+
+    Returns:
+        degrees: an updated copy of degrees
+
+        pruned_edges: an int64 array of shape (k, 2) with the (u, v) edges removed, with u < v
+
+        pruned_nodes: a sorted list of pruned spurs, each a list of nodes starting with its end node
+    """
+    degrees = degrees.copy()
+    pruned = np.zeros(len(degrees), dtype=bool)
+    pruned_edges = []
+    pruned_nodes = []
+
+    candidates = np.flatnonzero(degrees == 1).tolist()
+    while(len(candidates) > 0):
+        spurs_by_junction = {}
+        for end_node in candidates:
+            branch, junction = find_spur(graph, degrees, pruned, end_node, spur_length)
+            if(branch is not None):
+                spurs_by_junction.setdefault(junction, []).append(branch)
+
+        candidates = []
+        for junction, branches in spurs_by_junction.items():
+            branches.sort(key=lambda branch: (len(branch), branch[0]))
+            num_pruned = min(len(branches), degrees[junction] - 2)
+
+            for branch in branches[:num_pruned]:
+                branch_edges = zip(branch, branch[1:] + [junction])
+                pruned_edges.extend([(min(u, v), max(u, v)) for (u, v) in branch_edges])
+                pruned_nodes.append(branch)
+                pruned[branch] = True
+                degrees[branch] = 0
+                degrees[junction] -= 1
+
+            # the junction is now a turning node, so the branches kept at it are longer, and may be spurs of the next junction
+            if(degrees[junction] == 2):
+                candidates.extend([branch[0] for branch in branches[num_pruned:]])
+
+    pruned_edges = np.array(pruned_edges, dtype=np.int64).reshape(-1, 2)
+
+    return degrees, pruned_edges, sorted(pruned_nodes)
+
+
+def contract_junction_clusters(graph: CSRGraph, degrees: np.ndarray, coordinates: np.ndarray):
+    """
+    Contract every cluster of 2 or more adjacent junction pixels into one node, its representative, so that thick or
+    blobby parts of a skeleton become one junction instead of many short junction-to-junction paths.
+    Use expand_contracted_path() to turn paths traced on the contracted graph back into pixel paths.
+
+    Parameters:
+        graph: a CSRGraph, with the clique edges (and pruned spurs) already removed
+
+        degrees: the degree of every node in graph
+
+        coordinates: an (N, 2) array with the [x, y] location of every node, from create_csr_graph()
+
+    Returns:
+        contracted_graph: a CSRGraph with the same node ids, where each cluster is replaced by its representative, which is
+                          joined to every node next to the cluster. The other nodes of a cluster are left without edges
+
+        junction_clusters: a list of clusters, each a list of nodes that starts with its representative (the node closest to
+                           the middle of the cluster), followed by the other nodes from smallest to largest
+
+        cluster_parents: an int64 array with, for every node of a cluster, the next node on a shortest path (within the
+                         cluster) to its representative, and -1 for representatives and every other node
+    """
+    num_nodes = len(degrees)
+    rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(graph.indptr))
+    cols = graph.indices.astype(np.int64)
+
+    # clusters are the connected components of the graph of edges between two junctions
+    junctions = degrees >= 3
+    junction_edges = junctions[rows] & junctions[cols]
+    junction_graph = sparse.csr_matrix((np.ones(junction_edges.sum(), dtype=np.int8), (rows[junction_edges], cols[junction_edges])),
+                                       shape=(num_nodes, num_nodes))
+    _, labels = csgraph.connected_components(junction_graph, directed=False)
+    in_cluster = junctions & (np.bincount(labels)[labels] >= 2)
+
+    cluster_nodes = np.flatnonzero(in_cluster)
+    cluster_nodes = cluster_nodes[np.argsort(labels[cluster_nodes], kind="stable")]
+    split_points = np.flatnonzero(np.diff(labels[cluster_nodes])) + 1
+
+    representatives = np.arange(num_nodes, dtype=np.int64)
+    cluster_parents = np.full(num_nodes, -1, dtype=np.int64)
+    junction_clusters = []
+    for nodes in (np.split(cluster_nodes, split_points) if len(cluster_nodes) > 0 else []):
+        # the node closest to the mean location of the cluster, argmin() picks the smallest node on ties
+        distances = ((coordinates[nodes] - coordinates[nodes].mean(axis=0)) ** 2).sum(axis=1)
+        representative = int(nodes[np.argmin(distances)])
+        representatives[nodes] = representative
+        junction_clusters.append([representative] + [node for node in nodes.tolist() if node != representative])
+
+        # a breadth-first search from the representative gives the shortest way back to it from every node of the cluster
+        queue = deque([representative])
+        while(queue):
+            node = queue.popleft()
+            for neighbor in graph[node]:
+                if(in_cluster[neighbor] and neighbor != representative and cluster_parents[neighbor] == -1):
+                    cluster_parents[neighbor] = node
+                    queue.append(neighbor)
+
+    # move the edges of every cluster to its representative, dropping edges within a cluster and duplicate edges
+    contracted_rows, contracted_cols = representatives[rows], representatives[cols]
+    keep = contracted_rows != contracted_cols
+    edge_keys = np.unique(contracted_rows[keep] * num_nodes + contracted_cols[keep])
+
+    indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(edge_keys // num_nodes, minlength=num_nodes), out=indptr[1:])
+    contracted_graph = CSRGraph(indptr, (edge_keys % num_nodes).astype(np.int32), graph.nodes)
+
+    return contracted_graph, junction_clusters, cluster_parents
+
+
+def expand_contracted_path(path: list, graph: CSRGraph, cluster_parents: np.ndarray, representatives: dict) -> list:
+    """
+    Turn a path traced on the graph from contract_junction_clusters() back into a path of neighboring pixels.
+
+    Where a path starts or ends at a representative, it is extended from the pixel of the cluster that the path enters
+    (the smallest node of the cluster next to the path) to the representative. Where a path only passes through a
+    cluster, it takes the shortest way through the cluster between the pixels it enters and leaves by.
+
+    Parameters:
+        path: a list of nodes of the contracted graph
+
+        graph: the CSRGraph given to contract_junction_clusters()
+
+        cluster_parents: from contract_junction_clusters()
+
+        representatives: a dictionary with the representative of every cluster as keys and a set of the cluster's nodes as values
+
+    Returns:
+        expanded_path: a list of nodes where every two consecutive nodes are neighbors in graph
+    """
+    def path_to_representative(node):
+        nodes = [node]
+        while(cluster_parents[nodes[-1]] != -1):
+            nodes.append(int(cluster_parents[nodes[-1]]))
+        return nodes
+
+    def entry_node(node, representative):
+        return min([neighbor for neighbor in graph[node] if neighbor in representatives[representative]])
+
+    expanded_path = []
+    for idx, node in enumerate(path):
+        if(node not in representatives):
+            expanded_path.append(node)
+            continue
+
+        entering = path_to_representative(entry_node(path[idx-1], node)) if idx > 0 else [node]
+        leaving = path_to_representative(entry_node(path[idx+1], node))[::-1] if idx < len(path) - 1 else [node]
+
+        if(0 < idx < len(path) - 1):
+            # only passing through, so turn back towards the exit where both ways to the representative meet
+            leaving_nodes = set(leaving)
+            meeting_idx = next(entering_idx for (entering_idx, entering_node) in enumerate(entering) if entering_node in leaving_nodes)
+            expanded_path.extend(entering[:meeting_idx+1] + leaving[leaving.index(entering[meeting_idx])+1:])
+        else:
+            expanded_path.extend(entering + leaving[1:])
+
+    return expanded_path
+
+
 def get_node_combinations(clique: list) -> list:
     """
     Given a clique containing 3 nodes, create all combinations between them.
@@ -696,9 +1288,42 @@ def format_list(input_list: list) -> list:
         return input_list
 
 
+def find_pure_loop(graph: nxGraph, root: int) -> list:
+    """
+    If root is part of a component in which every node has degree 2 (a perfect loop), walk the loop the same way
+    nx.cycle_basis() does when its depth-first search starts at root: from the first neighbor of root, away from root, back to root.
+
+    Parameters:
+        graph: a NetworkX graph
+
+        root: a node with degree 2
+
+    Returns:
+        loop: a list of the nodes in the loop, ending with root (and not repeating it), or None if the component is not a perfect loop
+    """
+    previous_node, current_node = root, next(iter(graph[root]))
+    loop = [current_node]
+
+    while(current_node != root):
+        neighbors = list(graph[current_node])
+        if(len(neighbors) != 2):
+            return None
+
+        previous_node, current_node = current_node, neighbors[1] if neighbors[0] == previous_node else neighbors[0]
+        loop.append(current_node)
+
+    return loop
+
+
 def add_cycles(graph: nxGraph, current_paths_list: list, pathseg_points_list: list) -> list:
     """
-    ...
+    Find the cycles left in graph after get_initial_paths() and add them to current_paths_list, each starting
+    (and ending) at its first path segmentation point, if it has one.
+
+    This returns the same cycles, in the same order, as running nx.cycle_basis() on graph: components are searched
+    starting from their last node (in graph order), like nx.cycle_basis() does. Most components left over are perfect
+    loops where every node has degree 2, e.g. closed contour lines, which are walked directly with find_pure_loop().
+    Only the other components that have cycles (more edges than a tree) are handed to nx.cycle_basis().
 
     Parameters:
         graph: a NetworkX graph
@@ -710,15 +1335,34 @@ def add_cycles(graph: nxGraph, current_paths_list: list, pathseg_points_list: li
     Returns:
         full_paths_list: current_paths_list + cycles
     """
-    
+    pathseg_points_set = set(pathseg_points_list)
+    cycle_paths = []
+    visited_nodes = set()
+
+    for root in reversed(list(graph)):
+        if(root in visited_nodes):
+            continue
+
+        loop = find_pure_loop(graph, root) if graph.degree(root) == 2 else None
+        if(loop is not None):
+            visited_nodes.update(loop)
+            cycle_paths.append(loop)
+            continue
+
+        component = nx.node_connected_component(graph, root)
+        visited_nodes.update(component)
+
+        # a tree has no cycles, it has exactly one edge less than it has nodes
+        num_edges = sum([graph.degree(node) for node in component]) // 2
+        if(num_edges >= len(component)):
+            cycle_paths.extend(nx.cycle_basis(graph.subgraph(component), root))
+
     # this could return a list of lists containing cycle paths, or [] if no cycles exist
     # networkx.shortest_path(g, node, node) will return [node], which is not what we want
     updated_cycles_list = []
 
-    cycle_paths = nx.cycle_basis(graph)
-    
     for cycle in cycle_paths:
-        found_pathseg_point = [node for node in cycle if node in pathseg_points_list]
+        found_pathseg_point = [idx for (idx, node) in enumerate(cycle) if node in pathseg_points_set]
         # if this is an empty list, then there are no path segmentation points (perfect loop case)
         if(len(found_pathseg_point) == 0):
             updated_cycles_list.append(cycle)
@@ -726,7 +1370,7 @@ def add_cycles(graph: nxGraph, current_paths_list: list, pathseg_points_list: li
         # normally only 1, where the loop starts and ends at a given node
         # but it can also be the case that multiple junctions form a "chain" and make up part of a loop
         else:
-            pathseg_point_idx = [cycle.index(pathseg_point) for pathseg_point in found_pathseg_point][0]
+            pathseg_point_idx = found_pathseg_point[0]
             updated_cycle = cycle[pathseg_point_idx:] + cycle[:pathseg_point_idx]
             updated_cycles_list.append(updated_cycle)
     
@@ -826,97 +1470,291 @@ def segment_paths(graph: nxGraph, pathseg_points_list: list) -> list:
     return final_paths_list
 
 
-def TGGLinesPlus(skeleton: np.ndarray) -> dict:
+def trace_chain(graph: nxGraph, start_node: int, next_node: int, pathseg_points_set: set) -> list:
     """
-    This method is currently designed for one image skeleton, though it also works for lists of skeletons. 
-    For instance, you can use a list comprehension on a list of input images like so: 
-        image_binaries_list = [create_binaries(image) for image in input_images_list]
-        image_skeletons_list = [create_seletons(binary) for binary in image_binaries_list]
-        results_dict_list = [TGGLinesPlus(skeleton) for skeleton in image_skeletons_list]
+    Walk from start_node along the edge (start_node, next_node), following turning nodes (degree 2)
+    until a node in pathseg_points_set is reached.
 
     Parameters:
-        skeleton: an array representing an image skeleton (image --> binary --> skeleton)
+        graph: a NetworkX graph
+
+        start_node: the node to start walking from, usually a path segmentation point
+
+        next_node: a neighbor of start_node, which sets the direction of the walk
+
+        pathseg_points_set: a set of points (junctions + terminals) that stop the walk
 
     Returns:
-        a dictionary of important values and objects generated during the method
+        chain: a list of nodes starting with start_node and ending with the first path segmentation point reached
+    """
+    chain = [start_node, next_node]
+    previous_node, current_node = start_node, next_node
+
+    while(current_node not in pathseg_points_set):
+        neighbors = list(graph[current_node])
+        if(len(neighbors) != 2):
+            raise ValueError(f"Node {current_node} is not a path segmentation point, but has degree {len(neighbors)}")
 
+        # a turning node has exactly two neighbors, one of which we just came from
+        if(neighbors[0] == previous_node):
+            previous_node, current_node = current_node, neighbors[1]
+        else:
+            previous_node, current_node = current_node, neighbors[0]
+        chain.append(current_node)
+
+    return chain
+
+
+def orient_loop(graph: nxGraph, loop: list, root: int) -> list:
     """
-    start = timeit.default_timer()
-    
-    # this list will be used to keep track of sublists
-    subgraphs_list = []
-    
-    ### CREATE GRAPH ####
-    # convert skeleton to scipy sparse array, then create graph from scipy sparse array
-    skeleton_array, skeleton_coordinates = create_skeleton_graph(skeleton, connectivity=2)
-    skeleton_graph = nx.from_scipy_sparse_array(skeleton_array)
-    search_by_node, search_by_location = get_node_locations(skeleton_coordinates)
+    Orient a loop that starts and ends at the same node the same way nx.cycle_basis() would traverse it
+    when its depth-first search starts at root, a node inside of the loop.
 
-    # get subgraphs from main graph
-    # we need to get the nodes for each connected component in subgraph because nx.subgraph() expects a list of nodes called 'nbunch'
-    subgraph_nodes = [list(subgraph) for subgraph in list(nx.connected_components(skeleton_graph))]
-    subgraphs = [skeleton_graph.subgraph(node_list).copy() for node_list in subgraph_nodes]
+    nx.cycle_basis() pushes both neighbors of root onto its stack and explores the second one first,
+    so the loop is returned in the direction that visits root's second neighbor, then root, then its first neighbor.
 
-    # we do want to keep a list of potentially "noisy" nodes, so we make sure we have full path coverage of the graph
-    speckle_nodes = [node_list for node_list in subgraph_nodes if len(node_list) < 3]
-    
-    # otherwise, remove subgraphs with less than 3 nodes, this might just be noise or "speckle" in the image
-    subgraph_nodes = [node_list for node_list in subgraph_nodes if len(node_list) >= 3]
-    subgraphs = [subgraph for subgraph in subgraphs if len(subgraph.nodes()) >= 3]
+    Parameters:
+        graph: a NetworkX graph
 
-    for idx, subgraph in enumerate(subgraphs):
-        ### GRAPH PATH SIMPLIFICATION ####
-        # calculate node degrees and node types from graph
-        nodes = list(subgraph.nodes)
-        node_types, junction_nodes = find_junctions(subgraph, nodes)
+        loop: a list of nodes starting and ending with the same node, with root in between
 
-        # create NetworkX subgraph from junction nodes to find cliques
-        junction_subgraph = nx.subgraph(subgraph, nbunch=junction_nodes)
+        root: the node where nx.cycle_basis() starts its search
 
-        # find cliques and primary junction nodes
-        cliques, unique_cliques = get_unique_cliques(junction_subgraph, junction_nodes)
-        edges_to_remove = [find_removable_edges(clique, search_by_node) for clique in unique_cliques if len(clique) == 3]
+    Returns:
+        either the original loop, or the reversed loop
+    """
+    first_neighbor, second_neighbor = list(graph[root])[:2]
+    root_idx = loop.index(root, 1)
 
-        simple_subgraph = subgraph.copy()
-        simple_subgraph.remove_edges_from(edges_to_remove)
-        pathseg_graph = simple_subgraph.copy()
+    if(loop[root_idx - 1] == second_neighbor):
+        return loop
+    else:
+        return list(reversed(loop))
 
-        # we need to re-calcualte degrees and node types as path simplification may have removed some junctions
-        node_types_updated, junction_nodes_updated = find_junctions(pathseg_graph, nodes)
 
-        # for path segmentation, we also want to include "terminal" end nodes
-        end_node_locations = list(np.where(np.array(node_types_updated) == "E")[0])    
-        end_nodes = [nodes[idx] for idx in end_node_locations]
-        
-        ### PATH SEGMENTATION #### 
-        # collect junctions and end nodes
-        pathseg_points = sorted(junction_nodes_updated + end_nodes)
-        paths_list = segment_paths(pathseg_graph, pathseg_points)
+class ComponentBudgetExceeded(Exception):
+    """
+    Raised by ComponentBudget.charge() when segmenting a component takes more time or graph operations than it is allowed.
+    """
 
-        # there is some repetition in returned values here
-        # if we did not re-include things like search_by_node, skeleton, etc., then the same plotting methods
-        # for the main graph and paths list would not work for subgraphs and their individual path lists
-        # NOTE: this does not include the 'runtime' parameter like the whole TGGLinesPlus method does
-        subgraph_dict = {
-            "cliques": unique_cliques,
-            "end_nodes": end_nodes,
-            "junction_nodes": junction_nodes_updated,
-            "node_types": node_types_updated,
-            "paths_list": paths_list, 
-            "pathseg_points": pathseg_points, 
-            "removed_edges": edges_to_remove,
-            "search_by_location": search_by_location,
-            "search_by_node": search_by_node,
-            "simple_graph": simple_subgraph,
-            "skeleton": skeleton,
-            "skeleton_coordinates": skeleton_coordinates,
-            "skeleton_graph": subgraph,
-            "speckle_nodes": speckle_nodes,
-        }
 
-        subgraphs_list.append(subgraph_dict)
+class ComponentBudget:
+    """
+    A budget for segmenting one connected component, in wall time and/or graph operations (nodes visited while tracing
+    paths), so that one badly connected component cannot stall a whole image or batch. Call start() before each component;
+    trace_paths() calls charge() as it walks the graph.
 
-    # now combine subgraph lists into flattened lists for reporting and plotting
+    Parameters:
+        max_seconds: the wall time allowed per component, None for no limit
+
+        max_operations: the number of graph operations allowed per component, None for no limit
+    """
+    def __init__(self, max_seconds: float = None, max_operations: int = None):
+        self.max_seconds = max_seconds
+        self.max_operations = max_operations
+        self.start()
+
+    def start(self):
+        """
+        Reset the budget for the next component.
+        """
+        self.operations = 0
+        self.started = timeit.default_timer()
+        self.deadline = None if self.max_seconds is None else self.started + self.max_seconds
+
+    def charge(self, operations: int = 1):
+        """
+        Count operations against the budget, and raise ComponentBudgetExceeded if it is used up.
+        """
+        self.operations += operations
+        if(self.max_operations is not None and self.operations > self.max_operations):
+            raise ComponentBudgetExceeded(f"more than {self.max_operations} graph operations")
+        if(self.deadline is not None and timeit.default_timer() > self.deadline):
+            raise ComponentBudgetExceeded(f"more than {self.max_seconds}s")
+
+
+def find_leftover_chains(graph: nxGraph, chains_list: list, group_of: dict, pathseg_points_set: set):
+    """
+    Find the chains that get_initial_paths() leaves in the graph. get_initial_paths() removes the turning nodes of the
+    shortest path between each pair of path segmentation points until that shortest path is made of path segmentation
+    points only. A chain between two points is on no shortest path if the points are joined by a shorter path over
+    edges between path segmentation points, so it is left over; if they are not, it is removed as soon as that pair is
+    searched. If both paths are just as long, it depends on how nx.shortest_path() breaks the tie, which would take
+    running get_initial_paths() to find out; such chains are counted as left over, which is how the tie came out on
+    every skeleton we checked.
+
+    Parameters:
+        graph: a NetworkX graph
+
+        chains_list: a list of chains from trace_chain() between two different path segmentation points,
+                     with at least one turning node
+
+        group_of: a dictionary with the group of every path segmentation point, where the points in a group are
+                  connected by edges between path segmentation points
+
+        pathseg_points_set: a set of points (junctions + terminals)
+
+    Returns:
+        leftover_chains: a list of the chains that are left over
+    """
+    leftover_chains = []
+    distances_from = {}
+
+    for chain in chains_list:
+        start_node, end_node = chain[0], chain[-1]
+        if(group_of[start_node] != group_of[end_node]):
+            continue
+
+        # breadth-first search over the edges between path segmentation points, once for each start node
+        if(start_node not in distances_from):
+            distances = {start_node: 0}
+            queue = deque([start_node])
+            while(queue):
+                current_node = queue.popleft()
+                for neighbor in graph[current_node]:
+                    if(neighbor in pathseg_points_set and neighbor not in distances):
+                        distances[neighbor] = distances[current_node] + 1
+                        queue.append(neighbor)
+            distances_from[start_node] = distances
+
+        if(distances_from[start_node][end_node] <= len(chain) - 1):
+            leftover_chains.append(chain)
+
+    return leftover_chains
+
+
+def trace_paths(graph: nxGraph, pathseg_points_list: list, budget: ComponentBudget = None) -> list:
+    """
+    Segment a graph from a given list of path segmentation points by walking each edge out of each path segmentation
+    point exactly once, tracing chains of turning nodes (degree 2) until the next path segmentation point is reached.
+    Components without any path segmentation points are perfect loops and are traced on their own.
+
+    This produces the same paths as segment_paths() (up to the orientation of some loops, see below), but runs in time
+    linear in the number of nodes in the graph, since it does not call nx.has_path() and nx.shortest_path() for every
+    pair of path segmentation points. The input graph is not modified.
+
+    NOTE: every node that is not a path segmentation point must have degree 2, which is the case for the junctions and
+    terminals found with find_junctions() inside of TGGLinesPlus().
+
+    Loops (paths that start and end at the same node) are oriented the way add_cycles() returns them from nx.cycle_basis(),
+    whose depth-first search starts at the last node (in graph order) of each connected component of the graph left over
+    by get_initial_paths(). That left over graph holds the path segmentation points, the edges between them, the loops,
+    and the chains that no shortest path went through, see find_leftover_chains(). When a chain is exactly as long as
+    the shortest path between its ends over path segmentation points, whether it is left over depends on how
+    nx.shortest_path() breaks the tie; such chains are always counted as left over. So loop orientation is canonical
+    rather than identical to segment_paths(): if nx.shortest_path() broke a tie the other way, a loop is the same cycle
+    of nodes, but can start at a different node or run the other way.
+
+    Parameters:
+        graph: a NetworkX graph
+
+        pathseg_points_list: a list of points (junctions + terminals) that we want to find paths for
+
+        budget: optional ComponentBudget, charged one operation for every node visited
+
+    Returns:
+        final_paths_list: a list of lists containing unique paths in input graph
+    """
+    pathseg_points_set = set(pathseg_points_list)
+    node_order = {node: idx for (idx, node) in enumerate(graph)}
+
+    # (end node, node before it) for every chain we have walked, so we never walk a chain again from its other end
+    traced_edges = set()
+    visited_nodes = set(pathseg_points_set)
+    paths_list = []
+    loops_list = []
+    chains_list = []
+
+    for node in pathseg_points_list:
+        for neighbor in graph[node]:
+            if((node, neighbor) in traced_edges):
+                continue
+
+            chain = trace_chain(graph, node, neighbor, pathseg_points_set)
+            if(budget is not None):
+                budget.charge(len(chain))
+            traced_edges.add((chain[-1], chain[-2]))
+            visited_nodes.update(chain[1:-1])
+
+            if(chain[0] == chain[-1]):
+                loops_list.append(chain)
+            else:
+                paths_list.append(format_list(chain))
+                if(len(chain) > 2):
+                    chains_list.append(chain)
+
+    # orient the loops hanging off of a path segmentation point
+    if(len(loops_list) > 0):
+        # group path segmentation points that are connected by an edge, then attach loops to their group
+        # the last node of each group (in graph order) is where nx.cycle_basis() starts its search
+        group_of = {}
+        group_roots = []
+        for point in pathseg_points_list:
+            if(point in group_of):
+                continue
+            group_id = len(group_roots)
+            group_of[point] = group_id
+            group_root = point
+            stack = [point]
+            while(stack):
+                current_point = stack.pop()
+                if(node_order[current_point] > node_order[group_root]):
+                    group_root = current_point
+                for neighbor in graph[current_point]:
+                    if(neighbor in pathseg_points_set and neighbor not in group_of):
+                        group_of[neighbor] = group_id
+                        stack.append(neighbor)
+            group_roots.append(group_root)
+
+        for loop in loops_list:
+            group_id = group_of[loop[0]]
+            loop_root = max(loop, key=node_order.get)
+            if(node_order[loop_root] > node_order[group_roots[group_id]]):
+                group_roots[group_id] = loop_root
+
+        # chains within a group can be left over too, chains between groups never are
+        for chain in find_leftover_chains(graph, chains_list, group_of, pathseg_points_set):
+            chain_root = max(chain[1:-1], key=node_order.get)
+            if(node_order[chain_root] > node_order[group_roots[group_of[chain[0]]]]):
+                group_roots[group_of[chain[0]]] = chain_root
+
+        for loop in loops_list:
+            group_root = group_roots[group_of[loop[0]]]
+            # if the search starts outside of the loop, the loop is walked from its first neighbor of loop[0], as traced above
+            if(group_root in loop[1:-1]):
+                loop = orient_loop(graph, loop, group_root)
+            paths_list.append(loop)
+
+    # anything left over is a perfect loop with no path segmentation points, or an isolated node (e.g. a pruned spur, see prune_spurs())
+    for node in graph:
+        if(node in visited_nodes or len(graph[node]) == 0):
+            continue
+
+        loop = trace_chain(graph, node, next(iter(graph[node])), {node})
+        visited_nodes.update(loop)
+        if(budget is not None):
+            budget.charge(2 * len(loop))
+
+        # nx.cycle_basis() returns the loop starting from the first neighbor of its last node, going away from it
+        loop_root = max(loop, key=node_order.get)
+        loop = trace_chain(graph, loop_root, next(iter(graph[loop_root])), {loop_root})
+        paths_list.append(loop[1:] + [loop[1]])
+
+    final_paths_list = sorted([list(path) for path in set([tuple(path) for path in paths_list])])
+
+    return final_paths_list
+
+
+def combine_subgraphs(subgraphs_list: list):
+    """
+    Combine the per-subgraph lists from TGGLinesPlus() into sorted, flattened lists for the whole graph.
+
+    Parameters:
+        subgraphs_list: a list of subgraph dictionaries, as created in TGGLinesPlus()
+
+    Returns:
+        cliques, end_nodes, junction_nodes, node_types, paths_list, pathseg_points, removed_edges: sorted lists over all subgraphs
+    """
     cliques = sorted(flatten_list([subgraph_dict["cliques"] for subgraph_dict in subgraphs_list]))
     end_nodes = sorted(flatten_list([subgraph_dict["end_nodes"] for subgraph_dict in subgraphs_list]))
     junction_nodes = sorted(flatten_list([subgraph_dict["junction_nodes"] for subgraph_dict in subgraphs_list]))
@@ -925,16 +1763,501 @@ def TGGLinesPlus(skeleton: np.ndarray) -> dict:
     pathseg_points = sorted(flatten_list([subgraph_dict["pathseg_points"] for subgraph_dict in subgraphs_list]))
     removed_edges = sorted(flatten_list([subgraph_dict["removed_edges"] for subgraph_dict in subgraphs_list]))
 
-    simple_graph = skeleton_graph.copy()
-    simple_graph.remove_edges_from(removed_edges)
+    return cliques, end_nodes, junction_nodes, node_types, paths_list, pathseg_points, removed_edges
+
+
+def segment_subgraph(subgraph: nxGraph, edges_to_remove: list, node_degrees: np.ndarray, budget: ComponentBudget = None) -> dict:
+    """
+    Remove the diagonal clique edges from one connected component (subgraph) and segment it into paths.
+    This is the part of TGGLinesPlus() that is repeated for every subgraph.
+
+    Parameters:
+        subgraph: a NetworkX graph of one connected component
+
+        edges_to_remove: a list of (u, v) edges to remove from subgraph, from find_window_cliques()
+
+        node_degrees: the degree of each node in subgraph after edges_to_remove are removed, in the order of subgraph.nodes
+
+        budget: optional ComponentBudget for segmenting subgraph
+
+    Returns:
+        a dictionary with the end_nodes, junction_nodes, node_types, paths_list, pathseg_points and simple_graph of subgraph,
+        and budget_exceeded, which is None, or the reason the budget ran out (then paths_list is None). If a budget is
+        given, also the seconds and trace_operations it took to trace the paths, otherwise these are None
+    """
+    nodes = np.array(list(subgraph.nodes), dtype=np.int64)
+
+    simple_subgraph = subgraph.copy()
+    simple_subgraph.remove_edges_from(edges_to_remove)
+
+    # for path segmentation, we want to include junction nodes and "terminal" end nodes
+    node_type_codes = degrees_to_node_types(node_degrees)
+    junction_nodes = nodes[node_type_codes == JUNCTION].tolist()
+    end_nodes = nodes[node_type_codes == END].tolist()
+
+    pathseg_points = sorted(junction_nodes + end_nodes)
+    # trace_paths() does not modify the graph, so we no longer need a separate copy of it for path segmentation
+    budget_exceeded = None
+    try:
+        if(budget is not None):
+            budget.start()
+        paths_list = trace_paths(simple_subgraph, pathseg_points, budget=budget)
+    except ComponentBudgetExceeded as error:
+        paths_list, budget_exceeded = None, str(error)
+
+    return {
+        "budget_exceeded": budget_exceeded,
+        "end_nodes": end_nodes,
+        "junction_nodes": junction_nodes,
+        "node_types": NODE_TYPES[node_type_codes].tolist(),
+        "paths_list": paths_list,
+        "pathseg_points": pathseg_points,
+        "seconds": None if budget is None else timeit.default_timer() - budget.started,
+        "simple_graph": simple_subgraph,
+        "trace_operations": None if budget is None else budget.operations,
+    }
+
+
+def segment_subgraphs_batch(subgraph_tasks: list) -> list:
+    """
+    Run segment_subgraph() on a batch of (subgraph, edges_to_remove, node_degrees, budget) tasks, this is what each worker
+    process runs in segment_subgraphs_parallel().
+    """
+    return [segment_subgraph(*task) for task in subgraph_tasks]
+
+
+def batch_subgraphs(subgraph_sizes: list, chunk_size: int) -> list:
+    """
+    Group consecutive subgraphs into batches of at least chunk_size nodes (the last batch can be smaller), so that tiny
+    subgraphs are sent to worker processes together instead of paying the cost of sending each one on its own.
+    Subgraphs with chunk_size nodes or more get a batch to themselves.
+
+    Parameters:
+        subgraph_sizes: a list with the number of nodes in each subgraph
+
+        chunk_size: the minimum number of nodes in a batch
+
+    Returns:
+        batches: a list of lists of subgraph indices, in the order of subgraph_sizes
+    """
+    batches = []
+    current_batch = []
+    current_size = 0
+
+    for idx, size in enumerate(subgraph_sizes):
+        current_batch.append(idx)
+        current_size += size
+        if(current_size >= chunk_size):
+            batches.append(current_batch)
+            current_batch = []
+            current_size = 0
+
+    if(len(current_batch) > 0):
+        batches.append(current_batch)
+
+    return batches
+
+
+def segment_subgraphs_parallel(subgraph_tasks: list, workers: int = None, chunk_size: int = 20000) -> list:
+    """
+    Run segment_subgraph() for every task in subgraph_tasks on a pool of worker processes.
+    Results come back in the same order as subgraph_tasks, no matter which worker finishes first.
+
+    Parameters:
+        subgraph_tasks: a list of (subgraph, edges_to_remove, node_degrees, budget) tuples, one per subgraph
+
+        workers: the number of worker processes, None uses every CPU
+
+        chunk_size: the minimum number of nodes sent to a worker at once, see batch_subgraphs()
+
+    Returns:
+        a list with one segment_subgraph() result per task
+    """
+    batches = batch_subgraphs([len(task[0]) for task in subgraph_tasks], chunk_size)
+
+    # a pool is not worth starting if all the work fits in one batch
+    if(len(batches) <= 1):
+        return segment_subgraphs_batch(subgraph_tasks)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batch_results = executor.map(segment_subgraphs_batch, [[subgraph_tasks[idx] for idx in batch] for batch in batches])
+        results = flatten_list(batch_results)
+
+    return results
+
+
+def find_uncovered_nodes(paths_list: list, node_mask: np.ndarray) -> set:
+    """
+    Find the nodes that no path goes through, by counting the paths through every node with np.bincount() instead of
+    building sets of nodes.
+
+    Parameters:
+        paths_list: a list of paths
+
+        node_mask: a boolean array that is True for every node that should be covered, i.e. every node outside of speckle
+
+    Returns:
+        uncovered_nodes: a set of nodes in node_mask that are not in any path
+    """
+    path_counts = np.bincount(np.fromiter(itertools.chain.from_iterable(paths_list), dtype=np.int64), minlength=len(node_mask))
+
+    return set(np.flatnonzero(node_mask & (path_counts == 0)).tolist())
+
+
+# callbacks called with the stats dictionary of every TGGLinesPlus() call, see register_stats_callback()
+STATS_CALLBACKS = []
+
+
+def register_stats_callback(callback):
+    """
+    Register a function to call with the stats dictionary (see PipelineStats) at the end of every TGGLinesPlus() call
+    in this process, e.g. to send it to a log. Stats are collected for every call while a callback is registered.
+    Returns callback, so this can be used as a decorator.
+    """
+    STATS_CALLBACKS.append(callback)
+
+    return callback
+
+
+def unregister_stats_callback(callback) -> None:
+    """
+    Remove a function registered with register_stats_callback().
+    """
+    STATS_CALLBACKS.remove(callback)
+
+
+class PipelineStats:
+    """
+    Per-stage timings and counters of one TGGLinesPlus() call. This is only created if stats=True is passed to
+    TGGLinesPlus() or a callback is registered, otherwise the pipeline skips every call to it.
+
+    The stats dictionary has:
+        backend: the TGGLinesPlus() backend
+        seconds: the wall time of each stage, stages follow each other and lap() records the time since the last lap
+        counters: totals for the whole skeleton, the number of nodes, edges, components, speckle_components, cliques,
+                  removed_edges, pathseg_points, paths, cycles (paths that start and end at the same node) and
+                  trace_operations (nodes visited by trace_paths(), see ComponentBudget)
+        components: arrays with one value for each subgraph (component with 3 or more nodes, in the order of
+                    subgraphs_list) for nodes, edges, cliques, removed_edges, paths and cycles, and with the "networkx"
+                    backend also the seconds and trace_operations of segment_subgraph()
+
+    Parameters:
+        backend: the TGGLinesPlus() backend
+    """
+    def __init__(self, backend: str):
+        self.seconds = {}
+        self.counters = {}
+        self.components = {}
+        self.stats_dict = {"backend": backend, "seconds": self.seconds, "counters": self.counters, "components": self.components}
+        self.last_lap = timeit.default_timer()
+
+    def lap(self, stage: str):
+        """
+        Add the time since the last lap to stage.
+        """
+        now = timeit.default_timer()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + now - self.last_lap
+        self.last_lap = now
+
+    def count(self, **counters):
+        """
+        Add to the counters for the whole skeleton.
+        """
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def count_components(self, labels: np.ndarray, component_offsets: np.ndarray, degrees: np.ndarray, cliques: list,
+                         removed_edges: np.ndarray, paths_list: list, pathseg_points: int):
+        """
+        Count nodes, edges, cliques, removed edges, paths and cycles for every subgraph and for the whole skeleton at once.
+
+        Parameters:
+            labels, component_offsets: from find_csr_components()
+
+            degrees: the degree of every node before any edge was removed, from find_node_degrees()
+
+            cliques, removed_edges, paths_list: the cliques, (u, v) edges removed and paths over the whole skeleton
+
+            pathseg_points: the number of path segmentation points
+        """
+        component_sizes = np.diff(component_offsets)
+        kept = component_sizes >= 3
+        subgraph_labels = np.where(kept, np.cumsum(kept) - 1, -1)[labels]
+        num_subgraphs = int(kept.sum())
+
+        def count_by_subgraph(first_nodes):
+            first_subgraphs = subgraph_labels[np.asarray(first_nodes, dtype=np.int64)]
+            return np.bincount(first_subgraphs[first_subgraphs >= 0], minlength=num_subgraphs)
+
+        first_path_nodes = [path[0] for path in paths_list]
+        first_cycle_nodes = [path[0] for path in paths_list if len(path) > 1 and path[0] == path[-1]]
+        removed_edges = np.asarray(removed_edges, dtype=np.int64).reshape(-1, 2)
+
+        self.components.update({
+            "nodes": component_sizes[kept],
+            "edges": (np.bincount(labels, weights=degrees, minlength=len(component_sizes))[kept] // 2).astype(np.int64),
+            "cliques": count_by_subgraph([clique[0] for clique in cliques]),
+            "removed_edges": count_by_subgraph(removed_edges[:, 0]),
+            "paths": count_by_subgraph(first_path_nodes),
+            "cycles": count_by_subgraph(first_cycle_nodes),
+        })
+        self.count(nodes=len(labels), edges=degrees.sum() // 2, components=len(component_sizes),
+                   speckle_components=len(component_sizes) - num_subgraphs, cliques=len(cliques),
+                   removed_edges=len(removed_edges), pathseg_points=pathseg_points, paths=len(paths_list),
+                   cycles=len(first_cycle_nodes))
+
+    def report(self) -> dict:
+        """
+        Call every registered callback with the stats dictionary, and return it.
+        """
+        for callback in list(STATS_CALLBACKS):
+            callback(self.stats_dict)
+
+        return self.stats_dict
+
+
+def start_stats(stats: bool, backend: str) -> PipelineStats:
+    """
+    Return a PipelineStats if stats are asked for or a callback is registered, otherwise None.
+    """
+    if(stats or len(STATS_CALLBACKS) > 0):
+        return PipelineStats(backend)
+
+    return None
+
+
+def TGGLinesPlus(skeleton: np.ndarray, backend: str = "networkx", build_graphs: bool = True, workers: int = 1, chunk_size: int = 20000,
+                 lazy: bool = False, keys: list = None, min_pixels: int = None, min_extent: int = None, spur_length: int = None,
+                 contract_junctions: bool = False, component_seconds: float = None, component_operations: int = None,
+                 on_budget_exceeded: str = "fallback", stats: bool = False) -> dict:
+    """
+    This method is currently designed for one image skeleton, though it also works for lists of skeletons. 
+    For instance, you can use a list comprehension on a list of input images like so: 
+        image_binaries_list = [create_binaries(image) for image in input_images_list]
+        image_skeletons_list = [create_seletons(binary) for binary in image_binaries_list]
+        results_dict_list = [TGGLinesPlus(skeleton) for skeleton in image_skeletons_list]
+
+    Parameters:
+        skeleton: an array representing an image skeleton (image --> binary --> skeleton)
+
+        backend: "networkx" (default) to run every step on NetworkX graphs, or "csr" to run every step on
+                 CSR arrays instead (see TGGLinesPlus_csr()), which is much faster and lighter on large images
+
+        build_graphs: only used by the "csr" backend, whether to build the NetworkX graphs in the returned dictionary
+
+        workers: only used by the "networkx" backend, the number of worker processes to segment subgraphs with,
+                 1 (default) segments them one after another in this process, None uses every CPU
+
+        chunk_size: only used if workers is not 1, the minimum number of nodes to send to a worker at once,
+                    so that small subgraphs are batched together (see batch_subgraphs())
+
+        lazy: only used by the "csr" backend, whether to return a TGGLinesPlusResult instead of a dictionary, which only
+              builds the graphs, lookup dictionaries and subgraph dictionaries the first time they are accessed
+
+        keys: optional list of keys to return, e.g. ["paths_list"], None returns every key. With the "csr" backend,
+              values that are not asked for are never built. The "networkx" backend needs the graph of every subgraph
+              to segment it, so it only skips copying the whole simple_graph, and saves little time or memory;
+              use backend="csr" to save both
+
+        min_pixels, min_extent: optional thresholds to remove small components from the skeleton before the graph is
+                                built, see filter_speckle(). Components with less than 3 nodes are always left out of the
+                                paths as speckle, these thresholds remove larger ones too, and save building graphs for them.
+                                If either is given, "skeleton" in the result is the filtered skeleton (so node numbers match it),
+                                and the removed components are returned as "speckle_pixels"
+
+        spur_length: optional, prune terminal branches with fewer nodes than this before path segmentation, see prune_spurs().
+                     The edges of pruned spurs are added to removed_edges, and the spurs are returned as "pruned_nodes"
+
+        contract_junctions: only used by the "csr" backend, whether to contract every cluster of 2 or more adjacent junction
+                            pixels into one junction before path segmentation (see contract_junction_clusters()), so thick
+                            or blobby regions give one junction instead of many short junction-to-junction paths.
+                            Paths are expanded back to pixels and meet at the middle of each cluster, the clusters are
+                            returned as "junction_clusters", and their other nodes have node type "I"
+
+        component_seconds, component_operations: only used by the "networkx" backend, an optional budget for segmenting
+                                                 each subgraph, in wall time and/or graph operations (see ComponentBudget)
+
+        on_budget_exceeded: what to do with a subgraph that runs out of its budget, "fallback" (default) segments it again
+                            on CSR arrays with no budget, like the "csr" backend does, "skip" leaves it without paths
+                            (its nodes are left out of the coverage check). The fallback is not limited by the budget,
+                            but it runs trace_paths() once, in time linear in the number of nodes of the subgraph, plus
+                            one pass over the CSR arrays of the whole skeleton the first time it is needed, to remove the
+                            clique edges. Either way, every such subgraph is listed in
+                            "budget_exceeded" as a dictionary with its index in subgraphs_list, its number of nodes, the
+                            reason and the action taken
+
+        stats: whether to return per-stage timings and counters for the whole skeleton and for each subgraph as "stats",
+               see PipelineStats. They are also collected (and passed to the callbacks) while a callback is registered
+               with register_stats_callback(), otherwise nothing is collected
+
+    Returns:
+        a dictionary of important values and objects generated during the method
+
+    """
+    if(backend == "csr"):
+        csr_kwargs = {"build_graphs": build_graphs, "min_pixels": min_pixels, "min_extent": min_extent, "spur_length": spur_length,
+                      "contract_junctions": contract_junctions, "stats": stats}
+        if(keys is None):
+            return TGGLinesPlus_csr(skeleton, lazy=lazy, **csr_kwargs)
+        result = TGGLinesPlus_csr(skeleton, lazy=True, **csr_kwargs)
+        return dict([(key, result[key]) for key in keys])
+    elif(backend != "networkx"):
+        raise ValueError(f"Unknown backend '{backend}', expected 'networkx' or 'csr'")
+    elif(lazy):
+        raise ValueError("lazy results are only available with the 'csr' backend")
+    elif(contract_junctions):
+        raise ValueError("junction contraction is only available with the 'csr' backend")
+    elif(on_budget_exceeded not in ("fallback", "skip")):
+        raise ValueError(f"Unknown on_budget_exceeded '{on_budget_exceeded}', expected 'fallback' or 'skip'")
+
+    start = timeit.default_timer()
+    pipeline_stats = start_stats(stats, "networkx")
+    
+    # this list will be used to keep track of sublists
+    subgraphs_list = []
+
+    # optionally remove speckle on the raster, before any graph is built for it
+    speckle_pixels = None
+    if(min_pixels is not None or min_extent is not None):
+        skeleton, speckle_pixels = filter_speckle(skeleton, min_pixels, min_extent)
+        if(pipeline_stats is not None):
+            pipeline_stats.lap("filter_speckle")
+    
+    ### CREATE GRAPH ####
+    # convert skeleton to scipy sparse array, then create graph from scipy sparse array
+    skeleton_array, skeleton_coordinates = create_skeleton_graph(skeleton, connectivity=2)
+    skeleton_graph = nx.from_scipy_sparse_array(skeleton_array)
+    search_by_node, search_by_location = get_node_locations(skeleton_coordinates)
+
+    # label connected components on the sparse array, in the same order as nx.connected_components()
+    labels, component_nodes, component_offsets = find_csr_components(skeleton_array, order="bfs")
+    component_sizes = np.diff(component_offsets)
+    node_mask = (component_sizes >= 3)[labels]
+
+    # we need to get the nodes for each connected component in subgraph because nx.subgraph() expects a list of nodes called 'nbunch'
+    # nx.connected_components() returns each component as a set built in search order, listing the nodes of the same set
+    # keeps the node order of every subgraph (and so the order of its paths and node types) the same as before
+    def component_node_list(label):
+        return list(set(component_nodes[component_offsets[label]:component_offsets[label+1]].tolist()))
+
+    # we do want to keep a list of potentially "noisy" nodes, so we make sure we have full path coverage of the graph
+    speckle_nodes = [component_node_list(label) for label in np.flatnonzero(component_sizes < 3).tolist()]
+    
+    # otherwise, skip subgraphs with less than 3 nodes, this might just be noise or "speckle" in the image
+    subgraphs = [skeleton_graph.subgraph(component_node_list(label)).copy() for label in np.flatnonzero(component_sizes >= 3).tolist()]
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("create_graph")
+
+    ### GRAPH PATH SIMPLIFICATION ####
+    # calculate node degrees for every node at once from the skeleton
+    degrees = find_node_degrees(skeleton)
+
+    # find cliques and the diagonal edges to remove for the whole skeleton at once, then split them up by subgraph
+    all_cliques, all_edges_to_remove = find_window_cliques(skeleton, degrees)
+    subgraph_labels = (np.cumsum(component_sizes >= 3) - 1)[labels]
+    cliques_by_subgraph = [[] for subgraph in subgraphs]
+    edges_by_subgraph = [[] for subgraph in subgraphs]
+    for clique in all_cliques:
+        cliques_by_subgraph[subgraph_labels[clique[0]]].append(clique)
+    for edge in all_edges_to_remove.tolist():
+        edges_by_subgraph[subgraph_labels[edge[0]]].append(tuple(edge))
+
+    # we need to re-calcualte degrees and node types as path simplification may have removed some junctions
+    degrees_updated = update_node_degrees(degrees, all_edges_to_remove)
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("cliques")
+
+    # optionally prune short spurs, their edges are removed like the clique edges and their nodes are left without paths
+    pruned_nodes = None
+    if(spur_length is not None):
+        simple_csr_graph = CSRGraph.from_sparse_array(skeleton_array).remove_edges(all_edges_to_remove)
+        degrees_updated, pruned_edges, pruned_nodes = prune_spurs(simple_csr_graph, degrees_updated, spur_length)
+        for edge in pruned_edges.tolist():
+            edges_by_subgraph[subgraph_labels[edge[0]]].append(tuple(edge))
+        node_mask[flatten_list(pruned_nodes)] = False
+        if(pipeline_stats is not None):
+            pipeline_stats.lap("prune_spurs")
+
+    ### PATH SEGMENTATION ####
+    # each subgraph is independent, so they can be segmented one after another or spread over a pool of worker processes
+    budget = None
+    if(component_seconds is not None or component_operations is not None):
+        budget = ComponentBudget(component_seconds, component_operations)
+
+    # a budget without limits still counts the time and graph operations of each subgraph for the stats
+    task_budget = budget
+    if(task_budget is None and pipeline_stats is not None):
+        task_budget = ComponentBudget()
+
+    subgraph_tasks = [(subgraph, edges_by_subgraph[idx], degrees_updated[list(subgraph.nodes)], task_budget) for idx, subgraph in enumerate(subgraphs)]
+    if(workers == 1):
+        segmented_subgraphs = [segment_subgraph(*task) for task in subgraph_tasks]
+    else:
+        segmented_subgraphs = segment_subgraphs_parallel(subgraph_tasks, workers=workers, chunk_size=chunk_size)
+
+    budget_exceeded = []
+    fallback_graph = None
+    for idx, subgraph in enumerate(subgraphs):
+        segmented_subgraph = segmented_subgraphs[idx]
+
+        # a subgraph that ran out of its budget is segmented again without NetworkX, or skipped
+        # the fallback has no budget, but trace_paths() is linear in the nodes of the subgraph, so it is bounded anyway
+        if(segmented_subgraph["budget_exceeded"] is not None):
+            subgraph_nodes = np.sort(np.array(list(subgraph.nodes), dtype=np.int32))
+            if(on_budget_exceeded == "fallback"):
+                if(fallback_graph is None):
+                    fallback_graph = CSRGraph.from_sparse_array(skeleton_array).remove_edges(flatten_list(edges_by_subgraph))
+                segmented_subgraph["paths_list"] = trace_paths(fallback_graph.restrict(subgraph_nodes), segmented_subgraph["pathseg_points"])
+            else:
+                segmented_subgraph["paths_list"] = []
+                node_mask[subgraph_nodes] = False
+
+            budget_exceeded.append({
+                "subgraph": idx,
+                "num_nodes": len(subgraph_nodes),
+                "reason": segmented_subgraph["budget_exceeded"],
+                "action": on_budget_exceeded,
+            })
+
+        # there is some repetition in returned values here
+        # if we did not re-include things like search_by_node, skeleton, etc., then the same plotting methods
+        # for the main graph and paths list would not work for subgraphs and their individual path lists
+        # NOTE: this does not include the 'runtime' parameter like the whole TGGLinesPlus method does
+        subgraph_dict = {
+            "cliques": cliques_by_subgraph[idx],
+            "end_nodes": segmented_subgraph["end_nodes"],
+            "junction_nodes": segmented_subgraph["junction_nodes"],
+            "node_types": segmented_subgraph["node_types"],
+            "paths_list": segmented_subgraph["paths_list"], 
+            "pathseg_points": segmented_subgraph["pathseg_points"], 
+            "removed_edges": edges_by_subgraph[idx],
+            "search_by_location": search_by_location,
+            "search_by_node": search_by_node,
+            "simple_graph": segmented_subgraph["simple_graph"],
+            "skeleton": skeleton,
+            "skeleton_coordinates": skeleton_coordinates,
+            "skeleton_graph": subgraph,
+            "speckle_nodes": speckle_nodes,
+        }
+
+        subgraphs_list.append(subgraph_dict)
+
+    # now combine subgraph lists into flattened lists for reporting and plotting
+    cliques, end_nodes, junction_nodes, node_types, paths_list, pathseg_points, removed_edges = combine_subgraphs(subgraphs_list)
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("segment_paths")
+
+    # copying the whole graph is the one value we can skip building if it was not asked for
+    simple_graph = None
+    if(keys is None or "simple_graph" in keys):
+        simple_graph = skeleton_graph.copy()
+        simple_graph.remove_edges_from(removed_edges)
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("build_result")
 
     # lastly, we need to check for whether the paths span the graph
     # if they don't, then we know there are cycles within it and need to add them
-    nodes_set = set(tuple(skeleton_graph.nodes()))
-    paths_set = set(tuple(flatten_list(paths_list)))
-    speckle_set = set(tuple(flatten_list(speckle_nodes)))
-    paths_plus_noise = paths_set.union(speckle_set)
-    uncovered_nodes = nodes_set - paths_plus_noise
+    uncovered_nodes = find_uncovered_nodes(paths_list, node_mask)
 
     # check to see if paths (minus noise in the image) span the graph
     if(len(uncovered_nodes) > 0):
@@ -942,12 +2265,14 @@ def TGGLinesPlus(skeleton: np.ndarray) -> dict:
         print("Uncovered nodes: ", uncovered_nodes)
         print()
         raise Exception("Not every node in the graph is covered by a path.")
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("coverage")
 
     stop = timeit.default_timer()
     runtime = stop - start
 
     # return the updated graph object and important info as dict
-    return {
+    result_dict = {
         "cliques": cliques,
         "end_nodes": end_nodes,
         "junction_nodes": junction_nodes,
@@ -965,6 +2290,1117 @@ def TGGLinesPlus(skeleton: np.ndarray) -> dict:
         "subgraphs_list": subgraphs_list,
     }
 
+    if(speckle_pixels is not None):
+        result_dict["speckle_pixels"] = speckle_pixels
+    if(pruned_nodes is not None):
+        result_dict["pruned_nodes"] = pruned_nodes
+    if(budget is not None):
+        result_dict["budget_exceeded"] = budget_exceeded
+
+    if(pipeline_stats is not None):
+        pipeline_stats.count_components(labels, component_offsets, degrees, cliques, removed_edges, paths_list, len(pathseg_points))
+        pipeline_stats.components["seconds"] = np.array([segmented["seconds"] for segmented in segmented_subgraphs], dtype=np.float64)
+        pipeline_stats.components["trace_operations"] = np.array([segmented["trace_operations"] for segmented in segmented_subgraphs], dtype=np.int64)
+        pipeline_stats.count(trace_operations=pipeline_stats.components["trace_operations"].sum())
+        stats_dict = pipeline_stats.report()
+        if(stats):
+            result_dict["stats"] = stats_dict
+
+    if(keys is not None):
+        result_dict = dict([(key, result_dict[key]) for key in keys])
+
+    return result_dict
+
+
+# the keys of the dictionary returned by TGGLinesPlus(), in order
+RESULT_KEYS = ("cliques", "end_nodes", "junction_nodes", "node_types", "paths_list", "pathseg_points", "removed_edges", "runtime",
+               "search_by_location", "search_by_node", "simple_graph", "skeleton", "skeleton_coordinates", "skeleton_graph",
+               "subgraphs_list")
+
+
+class TGGLinesPlusResult(Mapping):
+    """
+    A read-only, dictionary-like TGGLinesPlus() result that only keeps the arrays computed by the "csr" backend,
+    and builds every other value the first time it is accessed, e.g. result["paths_list"] does not build any of the
+    NetworkX graphs, lookup dictionaries or subgraph dictionaries. Built values are kept, so they are only built once.
+
+    This is what TGGLinesPlus(..., lazy=True) returns. dict(result) or result.to_dict() gives the usual dictionary.
+
+    Parameters:
+        skeleton, coordinates: from create_csr_graph(skeleton)
+
+        labels, component_nodes, component_offsets: from find_csr_components()
+
+        unique_cliques: a sorted list of cliques, from find_window_cliques(), or a (nodes, offsets) pair of arrays with the
+                        cliques flattened like flatten_node_lists() in utils/results.py does, split the first time they
+                        are accessed
+
+        edges_to_remove: an array or list of (u, v) edges removed from the graph
+
+        node_type_codes: the node type code of every node after the edges were removed, see degrees_to_node_types()
+
+        paths_list: a sorted list of paths over all subgraphs, or a (nodes, offsets) pair of arrays, like unique_cliques
+
+        runtime: the runtime of TGGLinesPlus()
+
+        build_graphs: whether to build the NetworkX graphs (skeleton_graph and simple_graph, also for each subgraph),
+                      if False these are None
+
+        skeleton_array: optional scipy sparse matrix from create_csr_graph(skeleton), otherwise it is built again from the
+                        skeleton if the NetworkX graphs are needed
+
+        speckle_pixels: optional list of components removed by filter_speckle(), if given it is returned as "speckle_pixels"
+
+        pruned_nodes: optional list of spurs removed by prune_spurs() (or a (nodes, offsets) pair of arrays),
+                      if given it is returned as "pruned_nodes"
+
+        junction_clusters: optional list of clusters from contract_junction_clusters() (or a (nodes, offsets) pair of arrays),
+                           if given it is returned as "junction_clusters"
+
+        stats: optional stats dictionary from PipelineStats, if given it is returned as "stats"
+    """
+    def __init__(self, skeleton: np.ndarray, coordinates: np.ndarray, labels: np.ndarray, component_nodes: np.ndarray,
+                 component_offsets: np.ndarray, unique_cliques: list, edges_to_remove: np.ndarray, node_type_codes: np.ndarray,
+                 paths_list: list, runtime: float = None, build_graphs: bool = True, skeleton_array = None,
+                 speckle_pixels: list = None, pruned_nodes: list = None, junction_clusters: list = None, stats: dict = None):
+        self.coordinates = coordinates
+        self.labels = labels
+        self.component_nodes = component_nodes
+        self.component_offsets = component_offsets
+        self.edges_to_remove = np.asarray(edges_to_remove, dtype=np.int64).reshape(-1, 2)
+        self.node_type_codes = node_type_codes
+        self.build_graphs = build_graphs
+        self.skeleton_array = skeleton_array
+        self.index = None
+
+        # nodes of components with 3 or more nodes, the rest is "speckle"
+        self.node_mask = (np.diff(component_offsets) >= 3)[labels]
+
+        self.values = {
+            "runtime": runtime,
+            "skeleton": skeleton,
+        }
+
+        # node lists given as (nodes, offsets) arrays are only split into lists when they are accessed
+        self.flat_node_lists = {}
+        for key, value in [("cliques", unique_cliques), ("paths_list", paths_list)]:
+            if(isinstance(value, tuple)):
+                self.flat_node_lists[key] = value
+            else:
+                self.values[key] = value
+
+        # the optional keys are only there if their stage ran
+        self.result_keys = RESULT_KEYS
+        for key, value in [("speckle_pixels", speckle_pixels), ("pruned_nodes", pruned_nodes), ("junction_clusters", junction_clusters),
+                           ("stats", stats)]:
+            if(value is not None):
+                self.result_keys = self.result_keys + (key,)
+                if(isinstance(value, tuple)):
+                    self.flat_node_lists[key] = value
+                else:
+                    self.values[key] = value
+
+    def __getitem__(self, key: str):
+        if(key not in self.values):
+            if(key not in self.result_keys):
+                raise KeyError(key)
+            if(key in self.flat_node_lists):
+                self.values[key] = self.split_node_lists(*self.flat_node_lists.pop(key))
+            else:
+                self.values[key] = getattr(self, "build_" + key)()
+
+        return self.values[key]
+
+    def __iter__(self):
+        return iter(self.result_keys)
+
+    def __len__(self):
+        return len(self.result_keys)
+
+    def to_dict(self) -> dict:
+        """
+        Build every value and return the usual TGGLinesPlus() result dictionary.
+        """
+        return dict([(key, self[key]) for key in self.result_keys])
+
+    @staticmethod
+    def split_node_lists(nodes: np.ndarray, offsets: np.ndarray) -> list:
+        nodes = np.asarray(nodes).tolist()
+        offsets = np.asarray(offsets).tolist()
+
+        return [nodes[offsets[idx]:offsets[idx+1]] for idx in range(len(offsets) - 1)]
+
+    def build_end_nodes(self) -> list:
+        return np.flatnonzero(self.node_mask & (self.node_type_codes == END)).tolist()
+
+    def build_junction_nodes(self) -> list:
+        return np.flatnonzero(self.node_mask & (self.node_type_codes == JUNCTION)).tolist()
+
+    def build_node_types(self) -> list:
+        return sorted(NODE_TYPES[self.node_type_codes[self.node_mask]].tolist())
+
+    def build_pathseg_points(self) -> list:
+        return sorted(self["junction_nodes"] + self["end_nodes"])
+
+    def build_removed_edges(self) -> list:
+        return sorted([tuple(edge) for edge in self.edges_to_remove.tolist()])
+
+    @property
+    def node_index(self) -> NodeIndex:
+        """
+        The NodeIndex behind skeleton_coordinates, search_by_node and search_by_location, for vectorized lookups.
+        """
+        if(self.index is None):
+            self.index = NodeIndex(self.coordinates, self["skeleton"].shape)
+        return self.index
+
+    def build_skeleton_coordinates(self) -> list:
+        return self.node_index.coordinates_list
+
+    def build_search_by_node(self) -> dict:
+        return self.node_index.search_by_node
+
+    def build_search_by_location(self) -> dict:
+        return self.node_index.search_by_location
+
+    def build_skeleton_graph(self) -> nxGraph:
+        if(not self.build_graphs):
+            return None
+        if(self.skeleton_array is None):
+            _, _, self.skeleton_array = create_csr_graph(self["skeleton"])
+
+        return nx.from_scipy_sparse_array(self.skeleton_array)
+
+    def build_simple_graph(self) -> nxGraph:
+        if(not self.build_graphs):
+            return None
+        simple_graph = self["skeleton_graph"].copy()
+        simple_graph.remove_edges_from(self.edges_to_remove.tolist())
+
+        return simple_graph
+
+    def build_subgraphs_list(self) -> list:
+        labels, component_nodes, component_offsets = self.labels, self.component_nodes, self.component_offsets
+        node_types_updated = NODE_TYPES[self.node_type_codes]
+
+        component_sizes = np.diff(component_offsets)
+        speckle_nodes = [component_nodes[component_offsets[idx]:component_offsets[idx+1]].tolist() for idx in np.flatnonzero(component_sizes < 3)]
+
+        ### SPLIT RESULTS BY SUBGRAPH ####
+        component_labels = np.flatnonzero(component_sizes >= 3).tolist()
+        cliques_by_component = dict([(label, []) for label in component_labels])
+        removed_edges_by_component = dict([(label, []) for label in component_labels])
+        paths_by_component = dict([(label, []) for label in component_labels])
+        for clique in self["cliques"]:
+            cliques_by_component[labels[clique[0]]].append(clique)
+        for edge in self.edges_to_remove.tolist():
+            removed_edges_by_component[labels[edge[0]]].append(tuple(edge))
+        for path in self["paths_list"]:
+            paths_by_component[labels[path[0]]].append(path)
+
+        skeleton_graph = self["skeleton_graph"]
+        simple_graph = self["simple_graph"]
+
+        subgraphs_list = []
+        for label in component_labels:
+            nodes = component_nodes[component_offsets[label]:component_offsets[label+1]]
+            end_nodes = nodes[self.node_type_codes[nodes] == END].tolist()
+            junction_nodes_updated = nodes[self.node_type_codes[nodes] == JUNCTION].tolist()
+
+            subgraph_dict = {
+                "cliques": cliques_by_component[label],
+                "end_nodes": end_nodes,
+                "junction_nodes": junction_nodes_updated,
+                "node_types": node_types_updated[nodes].tolist(),
+                "paths_list": paths_by_component[label],
+                "pathseg_points": sorted(junction_nodes_updated + end_nodes),
+                "removed_edges": removed_edges_by_component[label],
+                "search_by_location": self["search_by_location"],
+                "search_by_node": self["search_by_node"],
+                "simple_graph": simple_graph.subgraph(nodes.tolist()).copy() if self.build_graphs else None,
+                "skeleton": self["skeleton"],
+                "skeleton_coordinates": self["skeleton_coordinates"],
+                "skeleton_graph": skeleton_graph.subgraph(nodes.tolist()).copy() if self.build_graphs else None,
+                "speckle_nodes": speckle_nodes,
+            }
+
+            subgraphs_list.append(subgraph_dict)
+
+        return subgraphs_list
+
+
+def TGGLinesPlus_csr(skeleton: np.ndarray, build_graphs: bool = True, lazy: bool = False, min_pixels: int = None,
+                     min_extent: int = None, spur_length: int = None, contract_junctions: bool = False, stats: bool = False) -> dict:
+    """
+    The TGGLinesPlus() pipeline run on CSR arrays (see utils/csr_graph.py) instead of NetworkX graphs. The pixel graph is
+    kept as int32 indptr/indices arrays through degree computation, clique removal, path segmentation and the coverage check,
+    and every step runs once over the whole image instead of once per copied subgraph.
+
+    The returned dictionary has the same keys and values as TGGLinesPlus(), with two exceptions:
+    - nodes in each subgraph dictionary are listed from smallest to largest
+    - loops are oriented as if every subgraph's nodes were in sorted order (see trace_paths()), where the NetworkX
+      backend uses the order of the subgraph it copied, so a loop can start at a different node or run the other way
+
+    Parameters:
+        skeleton: an array representing an image skeleton (image --> binary --> skeleton)
+
+        build_graphs: whether to build the NetworkX graphs (skeleton_graph and simple_graph, also for each subgraph),
+                      if False these are set to None, which saves most of the time and memory for large images
+
+        lazy: whether to return a TGGLinesPlusResult, which only builds the values that are accessed, instead of a dictionary
+
+        min_pixels, min_extent: optional thresholds to remove speckle before the graph is built, see TGGLinesPlus()
+
+        spur_length: optional, prune terminal branches with fewer nodes than this before path segmentation, see TGGLinesPlus()
+
+        contract_junctions: whether to contract clusters of adjacent junctions before path segmentation, see TGGLinesPlus()
+
+        stats: whether to return per-stage timings and counters as "stats", see TGGLinesPlus()
+
+    Returns:
+        a dictionary (or TGGLinesPlusResult) of important values and objects generated during the method
+    """
+    start = timeit.default_timer()
+    pipeline_stats = start_stats(stats, "csr")
+
+    # optionally remove speckle on the raster, before any graph is built for it
+    speckle_pixels = None
+    if(min_pixels is not None or min_extent is not None):
+        skeleton, speckle_pixels = filter_speckle(skeleton, min_pixels, min_extent)
+        if(pipeline_stats is not None):
+            pipeline_stats.lap("filter_speckle")
+
+    ### CREATE GRAPH ####
+    csr_graph, coordinates, skeleton_array = create_csr_graph(skeleton)
+
+    # label connected components, components with less than 3 nodes might just be noise or "speckle" in the image
+    labels, component_nodes, component_offsets = find_csr_components(skeleton_array)
+    node_mask = (np.diff(component_offsets) >= 3)[labels]
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("create_graph")
+
+    ### GRAPH PATH SIMPLIFICATION ####
+    # find cliques among junction nodes, then remove the diagonal edge of each 3 node clique
+    # speckle components have no junctions, so they never show up here
+    degrees = find_node_degrees(skeleton)
+    unique_cliques, edges_to_remove = find_window_cliques(skeleton, degrees)
+    simple_csr_graph = csr_graph.remove_edges(edges_to_remove)
+
+    # we need to re-calcualte degrees and node types as path simplification may have removed some junctions
+    degrees_updated = update_node_degrees(degrees, edges_to_remove)
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("cliques")
+
+    # optionally prune short spurs, their edges are removed like the clique edges and their nodes are left without paths
+    pruned_nodes = None
+    if(spur_length is not None):
+        degrees_updated, pruned_edges, pruned_nodes = prune_spurs(simple_csr_graph, degrees_updated, spur_length)
+        simple_csr_graph = simple_csr_graph.remove_edges(pruned_edges)
+        edges_to_remove = np.concatenate([np.asarray(edges_to_remove, dtype=np.int64).reshape(-1, 2), pruned_edges])
+        node_mask[flatten_list(pruned_nodes)] = False
+        if(pipeline_stats is not None):
+            pipeline_stats.lap("prune_spurs")
+
+    # optionally contract clusters of adjacent junctions into one node each, the paths are expanded back to pixels below
+    junction_clusters = None
+    trace_mask = node_mask.copy()
+    if(contract_junctions):
+        pixel_csr_graph = simple_csr_graph
+        simple_csr_graph, junction_clusters, cluster_parents = contract_junction_clusters(pixel_csr_graph, degrees_updated, coordinates)
+        degrees_updated = simple_csr_graph.degrees()
+        representatives = dict([(cluster[0], set(cluster)) for cluster in junction_clusters])
+
+        # every node of a cluster counts as covered by the cluster, only its representative is left in the graph to trace
+        cluster_nodes = flatten_list(junction_clusters)
+        node_mask[cluster_nodes] = False
+        trace_mask[cluster_nodes] = False
+        trace_mask[list(representatives)] = True
+        if(pipeline_stats is not None):
+            pipeline_stats.lap("contract_junctions")
+
+    simple_csr_graph = simple_csr_graph.restrict(np.flatnonzero(trace_mask).astype(np.int32))
+    pathseg_mask = trace_mask & ((degrees_updated == 1) | (degrees_updated >= 3))
+
+    ### PATH SEGMENTATION ####
+    # a budget without limits counts the graph operations for the stats
+    trace_budget = ComponentBudget() if pipeline_stats is not None else None
+    paths_list = trace_paths(simple_csr_graph, np.flatnonzero(pathseg_mask).tolist(), budget=trace_budget)
+    if(contract_junctions):
+        paths_list = sorted([expand_contracted_path(path, pixel_csr_graph, cluster_parents, representatives) for path in paths_list])
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("segment_paths")
+
+    # lastly, check whether the paths (plus noise in the image) span the graph
+    uncovered_nodes = find_uncovered_nodes(paths_list, node_mask)
+
+    if(len(uncovered_nodes) > 0):
+        print("Not every node in the graph is covered by a path.")
+        print("Uncovered nodes: ", uncovered_nodes)
+        print()
+        raise Exception("Not every node in the graph is covered by a path.")
+
+    stats_dict = None
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("coverage")
+        pipeline_stats.count_components(labels, component_offsets, degrees, unique_cliques, edges_to_remove, paths_list,
+                                        np.count_nonzero(pathseg_mask))
+        pipeline_stats.count(trace_operations=trace_budget.operations)
+        stats_dict = pipeline_stats.stats_dict if stats else None
+
+    result = TGGLinesPlusResult(skeleton, coordinates, labels, component_nodes, component_offsets, unique_cliques,
+                                edges_to_remove, degrees_to_node_types(degrees_updated), paths_list,
+                                build_graphs=build_graphs, skeleton_array=skeleton_array, speckle_pixels=speckle_pixels,
+                                pruned_nodes=pruned_nodes, junction_clusters=junction_clusters, stats=stats_dict)
+    if(not lazy):
+        result = result.to_dict()
+
+    stop = timeit.default_timer()
+    if(lazy):
+        result.values["runtime"] = stop - start
+    else:
+        result["runtime"] = stop - start
+
+    # the stats dictionary in the result is the same object, so the last stage is still added to it
+    if(pipeline_stats is not None):
+        pipeline_stats.lap("build_result")
+        pipeline_stats.report()
+
+    return result
+
+
+def remap_node_lists(node_lists: list, node_map: np.ndarray) -> list:
+    """
+    Map every node in a list of node lists (e.g. paths or cliques) to a new node id with one lookup in node_map.
+    """
+    if(len(node_lists) == 0):
+        return []
+    lengths = np.fromiter((len(nodes) for nodes in node_lists), dtype=np.int64, count=len(node_lists))
+    nodes = node_map[np.fromiter(itertools.chain.from_iterable(node_lists), dtype=np.int64, count=lengths.sum())]
+
+    return [part.tolist() for part in np.split(nodes, np.cumsum(lengths)[:-1])]
+
+
+def find_clique_diagonals(cliques: list, coordinates: np.ndarray) -> np.ndarray:
+    """
+    Find the diagonal edge of every 3 node clique in cliques, in the same order, like the edges_to_remove of
+    find_window_cliques(): the two nodes of a pixel triangle that differ in both row and column.
+
+    Parameters:
+        cliques: a sorted list of cliques, each a sorted list of nodes
+
+        coordinates: an array of shape (N, 2) with the [x, y] location of each node
+
+    Returns:
+        edges_to_remove: an int64 array of shape (k, 2) with the (u, v) diagonal edge of each 3 node clique
+    """
+    cliques_3 = np.array([clique for clique in cliques if len(clique) == 3], dtype=np.int64).reshape(-1, 3)
+    locations = coordinates[cliques_3]
+
+    pair_positions = np.array([[0, 1], [0, 2], [1, 2]])
+    is_diagonal = np.stack([(locations[:, u] != locations[:, v]).all(axis=-1) for u, v in pair_positions], axis=-1)
+
+    return np.take_along_axis(cliques_3, pair_positions[np.argmax(is_diagonal, axis=-1)], axis=1)
+
+
+def TGGLinesPlus_update(previous_result: dict, skeleton: np.ndarray, region: Window, build_graphs: bool = True,
+                        lazy: bool = False) -> dict:
+    """
+    Update a TGGLinesPlus_csr() result after the skeleton changed inside of a region, e.g. after a part of the image
+    was edited, instead of segmenting the whole skeleton again.
+
+    Only the connected components touching the region (or a pixel next to it) are segmented again: their cliques are found
+    with find_window_cliques() on those components alone and their paths are traced with trace_paths(). The cliques and
+    paths of every other component are taken from previous_result. Node ids follow the row-major order of the skeleton
+    pixels, so a pixel added or removed in the region shifts the node id of every pixel after it; reused cliques and paths
+    are mapped to the new node ids by pixel location. A component that does not touch the region has the same pixels and
+    the same neighbors as before, and the mapping keeps the order of its nodes, so its paths are the same as those found
+    by segmenting the new skeleton.
+
+    The result is the same as TGGLinesPlus_csr(skeleton, ...). Example:
+        result_dict = TGGLinesPlus_update(result_dict, edited_skeleton, Window(col_off, row_off, width, height))
+
+    Parameters:
+        previous_result: a TGGLinesPlus() result dictionary (or TGGLinesPlusResult) of the skeleton before the change,
+                         from the "csr" backend without speckle filtering, spur pruning or junction contraction
+
+        skeleton: the changed skeleton, with the same shape as previous_result["skeleton"]
+
+        region: a rasterio Window (in skeleton pixels) holding every pixel that changed
+
+        build_graphs, lazy: see TGGLinesPlus_csr()
+
+    Returns:
+        a dictionary (or TGGLinesPlusResult) of important values and objects generated during the method
+    """
+    start = timeit.default_timer()
+
+    for key in ["speckle_pixels", "pruned_nodes", "junction_clusters"]:
+        if(key in previous_result):
+            raise ValueError(f"previous_result has '{key}', only results without the optional stages can be updated")
+
+    previous_skeleton = np.asarray(previous_result["skeleton"]).astype(bool)
+    if(previous_skeleton.shape != skeleton.shape):
+        raise ValueError(f"skeleton has shape {skeleton.shape}, previous_result has shape {previous_skeleton.shape}")
+
+    region_mask = np.zeros(skeleton.shape, dtype=bool)
+    region_mask[region.toslices()] = True
+    if(np.any((previous_skeleton != skeleton.astype(bool)) & ~region_mask)):
+        raise ValueError("the skeleton changed outside of region")
+
+    ### CREATE GRAPH ####
+    csr_graph, coordinates, skeleton_array = create_csr_graph(skeleton)
+    labels, component_nodes, component_offsets = find_csr_components(skeleton_array)
+    node_mask = (np.diff(component_offsets) >= 3)[labels]
+    degrees = find_node_degrees(skeleton)
+
+    # components with a pixel in the region grown by one pixel are segmented again, every other component is unchanged
+    (row_start, row_stop), (col_start, col_stop) = region.toranges()
+    region_mask[max(row_start - 1, 0):row_stop + 1, max(col_start - 1, 0):col_stop + 1] = True
+    changed_labels = np.zeros(len(component_offsets) - 1, dtype=bool)
+    changed_labels[labels[region_mask[skeleton.astype(bool)]]] = True
+    changed_mask = changed_labels[labels]
+
+    ### REUSE UNCHANGED COMPONENTS ####
+    # map the old node ids to the new ones by location, nodes of unchanged components are all found
+    old_coordinates = np.asarray(previous_result["skeleton_coordinates"], dtype=np.int64).reshape(-1, 2)
+    old_to_new = NodeIndex(coordinates, skeleton.shape).nodes(old_coordinates)
+    old_unchanged = np.zeros(len(old_to_new), dtype=bool)
+    old_unchanged[old_to_new >= 0] = ~changed_mask[old_to_new[old_to_new >= 0]]
+
+    reused_cliques = remap_node_lists([clique for clique in previous_result["cliques"] if old_unchanged[clique[0]]], old_to_new)
+    reused_paths = remap_node_lists([path for path in previous_result["paths_list"] if old_unchanged[path[0]]], old_to_new)
+
+    ### GRAPH PATH SIMPLIFICATION ####
+    # find cliques on a crop of the skeleton holding only the changed components, whose nodes are in the same order
+    changed_nodes = np.flatnonzero(changed_mask)
+    changed_cliques = []
+    if(len(changed_nodes) > 0):
+        changed_coordinates = coordinates[changed_nodes]
+        corner = changed_coordinates.min(axis=0)
+        changed_skeleton = np.zeros(tuple(changed_coordinates.max(axis=0) - corner + 1), dtype=bool)
+        changed_skeleton[tuple((changed_coordinates - corner).T)] = True
+        crop_cliques, _ = find_window_cliques(changed_skeleton, degrees[changed_nodes])
+        changed_cliques = remap_node_lists(crop_cliques, changed_nodes.astype(np.int64))
+
+    unique_cliques = sorted(reused_cliques + changed_cliques)
+    edges_to_remove = find_clique_diagonals(unique_cliques, coordinates)
+    simple_csr_graph = csr_graph.remove_edges(edges_to_remove)
+    degrees_updated = update_node_degrees(degrees, edges_to_remove)
+
+    ### PATH SEGMENTATION ####
+    trace_mask = node_mask & changed_mask
+    simple_csr_graph = simple_csr_graph.restrict(np.flatnonzero(trace_mask).astype(np.int32))
+    pathseg_mask = trace_mask & ((degrees_updated == 1) | (degrees_updated >= 3))
+    changed_paths = trace_paths(simple_csr_graph, np.flatnonzero(pathseg_mask).tolist())
+
+    # the reused paths covered their components before, so only the changed components need checking
+    uncovered_nodes = find_uncovered_nodes(changed_paths, trace_mask)
+
+    if(len(uncovered_nodes) > 0):
+        print("Not every node in the graph is covered by a path.")
+        print("Uncovered nodes: ", uncovered_nodes)
+        print()
+        raise Exception("Not every node in the graph is covered by a path.")
+
+    paths_list = sorted(reused_paths + changed_paths)
+
+    result = TGGLinesPlusResult(skeleton, coordinates, labels, component_nodes, component_offsets, unique_cliques,
+                                edges_to_remove, degrees_to_node_types(degrees_updated), paths_list,
+                                build_graphs=build_graphs, skeleton_array=skeleton_array)
+    if(not lazy):
+        result = result.to_dict()
+
+    stop = timeit.default_timer()
+    if(lazy):
+        result.values["runtime"] = stop - start
+    else:
+        result["runtime"] = stop - start
+
+    return result
+
+
+def process_image(image: np.ndarray, reverse: bool = False, keys: list = None, **kwargs) -> dict:
+    """
+    Run the whole pipeline on one image: image --> binary --> skeleton --> TGGLinesPlus().
+
+    Parameters:
+        image: the input image as an array
+
+        reverse: whether to binarize with create_binary_reverse() (dark lines on a light background) instead of create_binary()
+
+        keys: optional list of keys to keep from the TGGLinesPlus() result dictionary, e.g. ["paths_list"], None keeps every key
+
+        kwargs: passed on to TGGLinesPlus()
+
+    Returns:
+        result_dict: the dictionary returned by TGGLinesPlus(), with only keys in it if keys is given
+    """
+    if(reverse):
+        binary = create_binary_reverse(image)
+    else:
+        binary = create_binary(image)
+    skeleton = create_skeleton(binary)
+    result_dict = TGGLinesPlus(skeleton, keys=keys, **kwargs)
+
+    return result_dict
+
+
+def process_image_chunk(images: list, reverse: bool, keys: list, skip_errors: bool, tgglinesplus_kwargs: dict) -> list:
+    """
+    Run process_image() on a chunk of images, this is what each worker process runs in TGGLinesPlus_batch().
+    If skip_errors is True, images that raise an exception get None as their result instead of stopping the whole batch.
+    """
+    results = []
+    for image in images:
+        try:
+            results.append(process_image(image, reverse=reverse, keys=keys, **tgglinesplus_kwargs))
+        except Exception:
+            if(not skip_errors):
+                raise
+            results.append(None)
+
+    return results
+
+
+def TGGLinesPlus_batch(images, workers: int = None, chunk_size: int = 64, max_in_flight: int = None, reverse: bool = False,
+                       keys: list = None, skip_errors: bool = False, **kwargs):
+    """
+    Run image --> binary --> skeleton --> TGGLinesPlus() over a stack of images on a pool of worker processes,
+    yielding one result dictionary per image, in the same order as images.
+
+    Images are read from images lazily and sent to workers in chunks of chunk_size, and at most max_in_flight chunks are
+    submitted at any time, so that neither the input images nor the results of a large dataset (e.g. the 60,000 images from
+    read_in_mnist()) need to be held in memory all at once. Results are yielded as soon as their chunk (and every chunk
+    before it) is done. Example:
+        for result_dict in TGGLinesPlus_batch(mnist_images, keys=["paths_list"]):
+            ...
+
+    Parameters:
+        images: any iterable of 2D image arrays, such as a list, a generator, or an (N, height, width) array
+
+        workers: the number of worker processes, None uses every CPU, 1 runs everything in this process without a pool
+
+        chunk_size: the number of images sent to a worker at once, larger chunks cost less overhead per image
+
+        max_in_flight: the maximum number of chunks submitted to the pool and not yet yielded, defaults to 2 * workers
+
+        reverse: whether to binarize with create_binary_reverse() instead of create_binary()
+
+        keys: optional list of keys to keep from each result dictionary, e.g. ["paths_list"], None keeps every key;
+              keeping fewer keys means less data to send back from the workers
+
+        skip_errors: if True, yield None for images where TGGLinesPlus() raises an exception instead of stopping
+
+        kwargs: passed on to TGGLinesPlus(), by default the "csr" backend is used without building NetworkX graphs
+
+    Returns:
+        a generator of result dictionaries (or None for skipped images), one per image
+    """
+    tgglinesplus_kwargs = {"backend": "csr", "build_graphs": False}
+    tgglinesplus_kwargs.update(kwargs)
+
+    image_iterator = iter(images)
+    chunks = iter(lambda: list(itertools.islice(image_iterator, chunk_size)), [])
+
+    if(workers == 1):
+        for chunk in chunks:
+            yield from process_image_chunk(chunk, reverse, keys, skip_errors, tgglinesplus_kwargs)
+        return
+
+    if(max_in_flight is None):
+        max_in_flight = 2 * (workers if workers is not None else os.cpu_count())
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        try:
+            for chunk in chunks:
+                in_flight.append(executor.submit(process_image_chunk, chunk, reverse, keys, skip_errors, tgglinesplus_kwargs))
+                # wait for the oldest chunk before submitting more, this keeps results in order and memory bounded
+                if(len(in_flight) >= max_in_flight):
+                    yield from in_flight.popleft().result()
+
+            while(in_flight):
+                yield from in_flight.popleft().result()
+        finally:
+            # if the caller stops early, do not wait for chunks nobody will read
+            for future in in_flight:
+                future.cancel()
+
+
+def find_tiled_threshold(read, height: int, width: int, tile_height: int, tile_width: int, method: str = "mean",
+                         nbins: int = 256) -> float:
+    """
+    Compute the same threshold as threshold_mean() (the mean pixel value) or threshold_otsu() for an image read one tile
+    at a time, so that every tile in TGGLinesPlus_tiled() is binarized with the threshold of the whole image.
+
+    The mean only needs a running sum. Otsu's method needs a histogram of the whole image: integer images of up to
+    16 bits get one bin per value (like threshold_otsu() does for integer images) in a single pass over the tiles,
+    other images need a first pass for the range of values, and a second one for a histogram of nbins bins over that range.
+
+    Parameters:
+        read: a function returning the pixels of a rasterio Window of the image
+
+        height, width: the shape of the image
+
+        tile_height, tile_width: the shape of the tiles to read
+
+        method: "mean" (default) or "otsu"
+
+        nbins: the number of histogram bins for Otsu's method, for images that are not integer images of up to 16 bits
+
+    Returns:
+        threshold: the threshold of the whole image
+    """
+    tile_windows = [tile_window for tile_window, _ in iter_tile_windows(height, width, tile_height, tile_width)]
+
+    if(method == "mean"):
+        total = 0
+        for tile_window in tile_windows:
+            tile = read(tile_window)
+            # integer images are summed exactly, so the mean comes out the same as np.mean() over the whole image
+            total += tile.sum(dtype=np.int64 if np.issubdtype(tile.dtype, np.integer) else np.float64)
+
+        return total / (height * width)
+    elif(method != "otsu"):
+        raise ValueError(f"Unknown threshold method '{method}', expected 'mean' or 'otsu'")
+
+    dtype = read(tile_windows[0]).dtype
+    if(np.issubdtype(dtype, np.integer) and np.iinfo(dtype).bits <= 16):
+        min_value = np.iinfo(dtype).min
+        counts = np.zeros(2 ** np.iinfo(dtype).bits, dtype=np.int64)
+        for tile_window in tile_windows:
+            counts += np.bincount((read(tile_window).ravel().astype(np.int64) - min_value), minlength=len(counts))
+
+        # keep the bins from the smallest to the largest value in the image, like threshold_otsu() does
+        used_values = np.flatnonzero(counts)
+        counts = counts[used_values[0]:used_values[-1] + 1]
+        bin_centers = np.arange(used_values[0], used_values[-1] + 1) + min_value
+    else:
+        value_range = [np.inf, -np.inf]
+        for tile_window in tile_windows:
+            tile = read(tile_window)
+            value_range = [min(value_range[0], tile.min()), max(value_range[1], tile.max())]
+
+        counts = np.zeros(nbins, dtype=np.int64)
+        for tile_window in tile_windows:
+            tile_counts, bin_edges = np.histogram(read(tile_window), bins=nbins, range=value_range)
+            counts += tile_counts
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+
+    if(len(counts) == 1):
+        return bin_centers[0]
+
+    return threshold_otsu(hist=(counts, bin_centers))
+
+
+def local_threshold_halo(block_size: int, method: str = "gaussian") -> int:
+    """
+    The number of pixels around a pixel that threshold_local() looks at, so that a tile read with this many extra pixels
+    on every side gets the same local threshold as the whole image, except for the extra pixels themselves.
+
+    Parameters:
+        block_size, method: see threshold_local()
+
+    Returns:
+        halo: the number of pixels
+    """
+    if(method == "gaussian"):
+        # threshold_local() uses sigma = (block_size - 1) / 6 and ndimage.gaussian_filter(), which truncates at 4 sigma
+        return int(4 * (block_size - 1) / 6 + 0.5)
+
+    return block_size // 2
+
+
+def iter_binary_tiles(read, height: int, width: int, tile_height: int, tile_width: int, halo: int = 0, reverse: bool = False,
+                      threshold: float = None, local_block_size: int = None, local_method: str = "gaussian", local_offset: float = 0):
+    """
+    Binarize an image one tile at a time, like create_binary() (or create_binary_reverse(), if reverse is True) with
+    a given global threshold, e.g. from find_tiled_threshold(). Only one tile is in memory at a time.
+
+    With local_block_size, each tile is binarized with threshold_local() instead, which only needs the pixels near each
+    tile: tiles are read with local_threshold_halo() more pixels on every side, so the result is the same as binarizing
+    the whole image with threshold_local() at once, for the "gaussian" and "median" methods.
+    The "mean" method is not supported: ndimage.uniform_filter() sums with running totals, so its rounding depends on
+    where the array starts, and pixels equal to the local mean (e.g. in flat areas) end up on either side of it.
+
+    Parameters:
+        read: a function returning the pixels of a rasterio Window of the image
+
+        height, width: the shape of the image
+
+        tile_height, tile_width: the shape of the tiles
+
+        halo: the number of extra pixels around each tile to binarize and return (clipped at the image edges)
+
+        reverse: whether lines are darker than the background (pixels below the threshold are True)
+
+        threshold: the global threshold, not used with local_block_size
+
+        local_block_size, local_method, local_offset: optional, the block_size, method ("gaussian" or "median") and
+                                                      offset for threshold_local()
+
+    Returns:
+        a generator of (tile_window, read_window, binary) tuples, like WindowedTiffReader.iter_tiles(), where binary is
+        the binarized pixels of read_window
+    """
+    if(local_block_size is None and threshold is None):
+        raise ValueError("threshold is needed unless local_block_size is given")
+    if(local_block_size is not None and local_method not in ("gaussian", "median")):
+        raise ValueError(f"Unsupported local_method '{local_method}' for tiles, expected 'gaussian' or 'median'")
+
+    threshold_halo = 0 if local_block_size is None else local_threshold_halo(local_block_size, local_method)
+
+    for tile_window, read_window in iter_tile_windows(height, width, tile_height, tile_width, halo):
+        if(local_block_size is None):
+            tile = read(read_window)
+            yield tile_window, read_window, (tile < threshold if reverse else tile > threshold)
+            continue
+
+        # read the extra pixels threshold_local() needs (clipped at the image edges), then cut them off again
+        row_start, col_start = max(0, read_window.row_off - threshold_halo), max(0, read_window.col_off - threshold_halo)
+        row_stop = min(height, read_window.row_off + read_window.height + threshold_halo)
+        col_stop = min(width, read_window.col_off + read_window.width + threshold_halo)
+        tile = read(Window(col_start, row_start, col_stop - col_start, row_stop - row_start))
+
+        local_threshold = threshold_local(tile, local_block_size, method=local_method, offset=local_offset)
+        binary = tile < local_threshold if reverse else tile > local_threshold
+        binary = binary[read_window.row_off - row_start:read_window.row_off - row_start + read_window.height,
+                        read_window.col_off - col_start:read_window.col_off - col_start + read_window.width]
+
+        yield tile_window, read_window, binary
+
+
+def find_tile_margin(binary: np.ndarray, read_window: Window, height: int, width: int) -> int:
+    """
+    Find the margin a tile needs for its skeleton to match the skeleton of the whole image, from the lines that cross
+    the edges of read_window inside of the image. skeletonize() thins a line from its edges inwards, one pixel per
+    iteration, so cutting a line at the edge of the tile can move its skeleton by up to its chessboard distance from the
+    middle of the line to its edge. segment_tile() then needs 2 more pixels, for the ring around the core of the tile.
+
+    Every pixel outside of read_window is taken to be part of the line it cuts (the most it could be), except outside
+    of the image, where create_skeleton() pads the binary with background.
+
+    Parameters:
+        binary: the binarized pixels of read_window
+
+        read_window: the Window of the image that binary covers, a tile and its margin
+
+        height, width: the shape of the image
+
+    Returns:
+        margin: the smallest margin in pixels for this tile, at least 2
+    """
+    # edges of read_window that are also edges of the image
+    image_edges = (read_window.row_off == 0, read_window.row_off + read_window.height == height,
+                   read_window.col_off == 0, read_window.col_off + read_window.width == width)
+    top, bottom, left, right = [int(edge) for edge in image_edges]
+
+    # ndimage counts every pixel outside of the array as foreground, so only the image edges are padded with background
+    padded = np.pad(binary, ((top, bottom), (left, right)))
+    distances = ndimage.distance_transform_cdt(padded, metric="chessboard")
+    distances = distances[top:distances.shape[0] - bottom, left:distances.shape[1] - right]
+
+    cut_distances = [distances[0], distances[-1], distances[:, 0], distances[:, -1]]
+    line_distance = max([edge_distances.max() for (edge_distances, image_edge) in zip(cut_distances, image_edges)
+                         if(not image_edge and edge_distances.size > 0)], default=0)
+
+    return max(2, int(line_distance) + 2)
+
+
+def segment_tile(skeleton: np.ndarray, offset: tuple, core: tuple) -> dict:
+    """
+    Run the TGGLinesPlus() steps on one tile of a skeleton, and cut its paths where they cross the edges of the tile.
+    This is what TGGLinesPlus_tiled() runs for every tile.
+
+    skeleton must cover the core of the tile plus a 2 pixel ring around it (clipped at the image edges): the ring makes
+    the degree, clique and removed edges of every node in the core the same as in the skeleton of the whole image.
+    Paths are traced inside the core only, and stop at every "cut point", a core node with an edge leaving the core.
+    Each edge leaving the core is returned as a path fragment of its own, by the tile holding its first node.
+
+    Parameters:
+        skeleton: a boolean array with the skeleton of the core and the ring around it
+
+        offset: the (row, col) location of skeleton[0, 0] in the whole skeleton
+
+        core: (row_start, row_stop, col_start, col_stop) of the core in the whole skeleton
+
+    Returns:
+        a dictionary with the cliques, removed_edges, end_nodes, junction_nodes and isolated_nodes in the core,
+        the paths that are complete ("paths_list"), the fragments that still need to be joined with fragments of
+        neighboring tiles ("fragments"), and the cut points where fragments are joined ("joinable_points"),
+        all as (row, col) locations in the whole skeleton
+    """
+    graph, coordinates, _ = create_csr_graph(skeleton)
+    coordinates = coordinates.astype(np.int64) + np.asarray(offset, dtype=np.int64)
+    locations = list(map(tuple, coordinates.tolist()))
+    row_start, row_stop, col_start, col_stop = core
+    in_core = ((coordinates[:, 0] >= row_start) & (coordinates[:, 0] < row_stop)
+               & (coordinates[:, 1] >= col_start) & (coordinates[:, 1] < col_stop))
+
+    degrees = find_node_degrees(skeleton)
+    cliques, edges_to_remove = find_window_cliques(skeleton, degrees)
+    degrees = update_node_degrees(degrees, edges_to_remove, copy=False)
+    graph = graph.remove_edges(edges_to_remove)
+    node_type_codes = degrees_to_node_types(degrees)
+
+    # nodes are numbered in row-major order, so a clique or edge belongs to the tile holding its first node, like a fragment
+    cliques = [[locations[node] for node in clique] for clique in cliques if in_core[clique[0]]]
+    removed_edges = [(locations[u], locations[v]) for (u, v) in edges_to_remove.tolist() if in_core[u]]
+
+    # split the edges into those inside the core, and those leaving it
+    num_nodes = len(degrees)
+    rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(graph.indptr))
+    core_entries = in_core[rows] & in_core[graph.indices]
+    seam_entries = in_core[rows] & ~in_core[graph.indices]
+    core_indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows[core_entries], minlength=num_nodes), out=core_indptr[1:])
+    core_graph = CSRGraph(core_indptr, graph.indices[core_entries], np.flatnonzero(in_core).astype(np.int32))
+
+    pathseg_mask = in_core & ((node_type_codes == END) | (node_type_codes == JUNCTION))
+    cut_mask = np.zeros(num_nodes, dtype=bool)
+    cut_mask[rows[seam_entries]] = True
+    stop_mask = pathseg_mask | cut_mask
+    # fragments are joined at cut points that are turning nodes, where exactly two fragments meet
+    joinable_mask = cut_mask & ~pathseg_mask
+
+    paths_list = []
+    fragments = []
+    for (u, v) in zip(rows[seam_entries].tolist(), graph.indices[seam_entries].tolist()):
+        if(u < v):
+            fragments.append([locations[u], locations[v]])
+
+    stop_nodes = np.flatnonzero(stop_mask).tolist()
+    stop_set = set(stop_nodes)
+    traced_edges = set()
+    # isolated nodes have no paths, TGGLinesPlus() counts them as speckle
+    visited_nodes = set(stop_nodes) | set(np.flatnonzero(node_type_codes == ISOLATED).tolist())
+    for node in stop_nodes:
+        for neighbor in core_graph[node]:
+            if((node, neighbor) in traced_edges):
+                continue
+
+            chain = trace_chain(core_graph, node, neighbor, stop_set)
+            traced_edges.add((chain[-1], chain[-2]))
+            visited_nodes.update(chain[1:-1])
+
+            if(joinable_mask[chain[0]] or joinable_mask[chain[-1]]):
+                fragments.append([locations[node] for node in chain])
+            else:
+                paths_list.append([locations[node] for node in chain])
+
+    # loops without any path segmentation points that do not leave the core
+    for node in core_graph:
+        if(node in visited_nodes):
+            continue
+
+        loop = trace_chain(core_graph, node, core_graph[node][0], {node})
+        visited_nodes.update(loop)
+        paths_list.append([locations[node] for node in loop])
+
+    return {
+        "cliques": cliques,
+        "end_nodes": [locations[node] for node in np.flatnonzero(in_core & (node_type_codes == END)).tolist()],
+        "fragments": fragments,
+        "isolated_nodes": [locations[node] for node in np.flatnonzero(in_core & (node_type_codes == ISOLATED)).tolist()],
+        "joinable_points": [locations[node] for node in np.flatnonzero(joinable_mask).tolist()],
+        "junction_nodes": [locations[node] for node in np.flatnonzero(in_core & (node_type_codes == JUNCTION)).tolist()],
+        "paths_list": paths_list,
+        "removed_edges": removed_edges,
+    }
+
+
+def stitch_fragments(fragments: list, joinable_points: set) -> list:
+    """
+    Join path fragments from neighboring tiles into whole paths at the points where they meet.
+    Exactly two fragments meet at each joinable point (a turning node), if a fragment ends up meeting itself, it is a loop.
+
+    Parameters:
+        fragments: a list of fragments, each a list of (row, col) locations
+
+        joinable_points: a set of (row, col) locations where fragments are joined
+
+    Returns:
+        paths_list: a list of joined paths, each a list of (row, col) locations
+    """
+    fragments = dict(enumerate(fragments))
+    fragment_ends = {}
+    for idx, fragment in fragments.items():
+        for point in (fragment[0], fragment[-1]):
+            if(point in joinable_points):
+                fragment_ends.setdefault(point, []).append(idx)
+
+    for point in list(fragment_ends):
+        ends = fragment_ends.pop(point)
+        if(len(ends) != 2):
+            raise ValueError(f"{len(ends)} path fragments meet at {point} instead of 2, the tiles disagree on the skeleton "
+                             "there, try a larger margin")
+
+        first_idx, second_idx = ends
+        if(first_idx == second_idx):
+            continue
+
+        # walk the first fragment to point, then the second one away from it
+        first_fragment = fragments[first_idx]
+        if(first_fragment[-1] != point):
+            first_fragment = list(reversed(first_fragment))
+        second_fragment = fragments.pop(second_idx)
+        if(second_fragment[0] != point):
+            second_fragment = list(reversed(second_fragment))
+        fragments[first_idx] = first_fragment + second_fragment[1:]
+
+        # the far end of the second fragment now belongs to the joined fragment
+        far_end = second_fragment[-1]
+        if(far_end in fragment_ends):
+            far_ends = fragment_ends[far_end]
+            far_ends[far_ends.index(second_idx)] = first_idx
+
+    return list(fragments.values())
+
+
+def TGGLinesPlus_tiled(image, tile_size: int = 1024, margin: int = 32, reverse: bool = False, threshold: float = None,
+                       band: int = 1, cache_bytes: int = 256 * 2**20, threshold_method: str = "mean",
+                       local_block_size: int = None, local_method: str = "gaussian", local_offset: float = 0) -> dict:
+    """
+    Run image --> binary --> skeleton --> TGGLinesPlus() one tile at a time, for images too large to skeletonize and
+    segment at once. Memory use depends on the tile size and the number of paths found, not on the size of the image.
+
+    Each tile is read with a margin around it (see WindowedTiffReader.iter_tiles()), binarized with the threshold of the
+    whole image and skeletonized. The skeleton is then segmented with segment_tile(), and the paths cut at the edges
+    of the tiles are joined again with stitch_fragments().
+
+    The margin must be wide enough for the skeleton of each tile to match the skeleton of the whole image: 2 pixels more
+    than the distance from the middle to the edge of the widest line crossing the edge of a tile, since skeletonize()
+    thins lines from their edges inwards. Every tile is checked with find_tile_margin() before it is skeletonized, and a
+    ValueError names the margin needed if it is too small. For mass_roads that is 9 pixels, images with large blobs need
+    a lot more.
+
+    The result matches TGGLinesPlus(create_skeleton(create_binary(image))), with every node given as its [row, col]
+    location in that padded skeleton (the values of search_by_node) instead of a node id, because node ids would need
+    the whole skeleton. Paths are sorted and oriented the same way, except loops, which can start at a different node
+    or run in the other direction. Example:
+        result_dict = TGGLinesPlus_tiled("../data/mass_roads/11278840_15.tif", tile_size=512)
+
+    Parameters:
+        image: the location of a TIFF file (read with WindowedTiffReader), or a 2D image array
+
+        tile_size: the size of the tiles, rounded up to the block layout of a TIFF file (see WindowedTiffReader.tile_shape())
+
+        margin: the number of extra pixels read on every side of a tile, at least 2
+
+        reverse: whether to binarize like create_binary_reverse() instead of create_binary()
+
+        threshold: the threshold to binarize with, by default it is found with find_tiled_threshold() and threshold_method,
+                   which costs an extra pass over the image
+
+        threshold_method: "mean" (default, like threshold_mean()) or "otsu" (like threshold_otsu()), see find_tiled_threshold()
+
+        local_block_size, local_method, local_offset: optional, binarize with threshold_local() instead of a global
+                                                      threshold, see iter_binary_tiles() (local_method "mean" is not
+                                                      supported). Then threshold is ignored and returned as None
+
+        band, cache_bytes: only used for TIFF files, see WindowedTiffReader
+
+    Returns:
+        a dictionary with the cliques, end_nodes, junction_nodes, paths_list, pathseg_points, removed_edges and speckle_nodes,
+        like TGGLinesPlus(), plus the runtime, the threshold and the shape of the padded skeleton
+    """
+    if(margin < 2):
+        raise ValueError("margin must be at least 2 pixels")
+
+    start = timeit.default_timer()
+
+    if(isinstance(image, str)):
+        reader = WindowedTiffReader(image, band=band, cache_bytes=cache_bytes)
+        read = reader.read_window
+        height, width = reader.shape
+        tile_height, tile_width = reader.tile_shape(tile_size)
+    else:
+        reader = None
+        read = lambda window: image[window.toslices()]
+        height, width = image.shape
+        tile_height, tile_width = tile_size, tile_size
+
+    cliques, end_nodes, junction_nodes, removed_edges, speckle_nodes = [], [], [], [], []
+    paths_list = []
+    fragments = []
+    joinable_points = set()
+
+    try:
+        if(local_block_size is not None):
+            threshold = None
+        elif(threshold is None):
+            threshold = find_tiled_threshold(read, height, width, tile_height, tile_width, method=threshold_method)
+
+        for tile_window, read_window, binary in iter_binary_tiles(read, height, width, tile_height, tile_width, margin, reverse,
+                                                                  threshold, local_block_size, local_method, local_offset):
+            # check the margin before skeletonizing, instead of failing to stitch the paths of a bad skeleton later on
+            tile_margin = find_tile_margin(binary, read_window, height, width)
+            if(tile_margin > margin):
+                raise ValueError(f"margin={margin} is too small for the tile at row {tile_window.row_off}, column "
+                                 f"{tile_window.col_off}, a line crossing its edge needs margin={tile_margin} or more, "
+                                 "see find_tile_margin()")
+
+            tile_skeleton = skeletonize(binary)
+
+            # the core of the tile plus a 2 pixel ring, clipped at the image edges, in image coordinates
+            row_start, row_stop = tile_window.row_off, tile_window.row_off + tile_window.height
+            col_start, col_stop = tile_window.col_off, tile_window.col_off + tile_window.width
+            ring_row_start, ring_col_start = max(0, row_start - 2), max(0, col_start - 2)
+            ring_row_stop, ring_col_stop = min(height, row_stop + 2), min(width, col_stop + 2)
+            skeleton_crop = tile_skeleton[ring_row_start - read_window.row_off:ring_row_stop - read_window.row_off,
+                                          ring_col_start - read_window.col_off:ring_col_stop - read_window.col_off]
+
+            # shift everything by 1 pixel, the padding that create_skeleton() adds
+            tile_dict = segment_tile(skeleton_crop, (ring_row_start + 1, ring_col_start + 1),
+                                     (row_start + 1, row_stop + 1, col_start + 1, col_stop + 1))
+
+            cliques.extend(tile_dict["cliques"])
+            end_nodes.extend(tile_dict["end_nodes"])
+            junction_nodes.extend(tile_dict["junction_nodes"])
+            removed_edges.extend(tile_dict["removed_edges"])
+            speckle_nodes.extend([[node] for node in tile_dict["isolated_nodes"]])
+            paths_list.extend(tile_dict["paths_list"])
+            fragments.extend(tile_dict["fragments"])
+            joinable_points.update(tile_dict["joinable_points"])
+    finally:
+        if(reader is not None):
+            reader.close()
+
+    paths_list.extend(stitch_fragments(fragments, joinable_points))
+
+    # orient paths like format_list(), nodes are numbered in row-major order, so comparing locations compares node ids
+    paths_list = [format_list(path) for path in paths_list]
+
+    # two end nodes joined to each other are a component with only 2 nodes, which TGGLinesPlus() counts as speckle
+    end_nodes_set = set(end_nodes)
+    speckle_pairs = [path for path in paths_list if len(path) == 2 and path[0] in end_nodes_set and path[1] in end_nodes_set]
+    if(len(speckle_pairs) > 0):
+        speckle_set = set(flatten_list(speckle_pairs))
+        paths_list = [path for path in paths_list if not (len(path) == 2 and path[0] in speckle_set)]
+        end_nodes = [node for node in end_nodes if node not in speckle_set]
+        speckle_nodes.extend(speckle_pairs)
+
+    def to_lists(node_lists):
+        return sorted([[list(node) for node in node_list] for node_list in node_lists])
+
+    end_nodes = sorted([list(node) for node in end_nodes])
+    junction_nodes = sorted([list(node) for node in junction_nodes])
+
+    stop = timeit.default_timer()
+
+    return {
+        "cliques": to_lists(cliques),
+        "end_nodes": end_nodes,
+        "junction_nodes": junction_nodes,
+        "paths_list": to_lists(paths_list),
+        "pathseg_points": sorted(end_nodes + junction_nodes),
+        "removed_edges": to_lists(removed_edges),
+        "runtime": stop - start,
+        "shape": (height + 2, width + 2),
+        "speckle_nodes": to_lists(speckle_nodes),
+        "threshold": threshold,
+    }
+
 
 def print_stats(result_dict: dict) -> dict:
     """
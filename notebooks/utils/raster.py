@@ -0,0 +1,219 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+from collections import OrderedDict
+
+import numpy as np
+
+import rasterio
+from rasterio.windows import Window
+
+
+class WindowedTiffReader:
+    """
+    Read one band of a (Geo)TIFF file window by window, so scenes larger than memory can be processed tile by tile.
+
+    Reads go through the file's internal blocks (tiles or strips, see dataset.block_shapes): every block a window
+    touches is read whole and kept in a least recently used (LRU) cache, bounded by cache_bytes, so neighboring windows
+    and their overlapping halos do not read the same blocks from disk twice.
+
+    Example:
+        with WindowedTiffReader("../data/mass_roads/11278840_15.tif") as reader:
+            for tile_window, read_window, tile in reader.iter_tiles(tile_size=512, halo=16):
+                ...
+
+    Parameters:
+        path: the full name / location of the TIFF file
+
+        band: the (1-based, like rasterio) index of the band to read
+
+        overview_level: optional index of the overview (reduced resolution copy) to read instead of the full
+                        resolution image, 0 being the largest overview, see dataset.overviews()
+
+        cache_bytes: the maximum number of bytes of blocks kept in the cache
+    """
+    def __init__(self, path: str, band: int = 1, overview_level: int = None, cache_bytes: int = 256 * 2**20):
+        if(overview_level is None):
+            self.dataset = rasterio.open(path)
+        else:
+            self.dataset = rasterio.open(path, overview_level=overview_level)
+
+        if(band not in self.dataset.indexes):
+            indexes = self.dataset.indexes
+            self.dataset.close()
+            raise ValueError(f"Band {band} not found in {path}, available bands: {indexes}")
+
+        self.band = band
+        self.height = self.dataset.height
+        self.width = self.dataset.width
+        self.dtype = np.dtype(self.dataset.dtypes[band - 1])
+        self.block_height, self.block_width = self.dataset.block_shapes[band - 1]
+
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.blocks = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.blocks.clear()
+        self.cached_bytes = 0
+        self.dataset.close()
+
+    @property
+    def shape(self) -> tuple:
+        return (self.height, self.width)
+
+    def read_block(self, block_row: int, block_col: int) -> np.ndarray:
+        """
+        Return one internal block of the band, from the cache if it is there, otherwise from the file.
+
+        Parameters:
+            block_row, block_col: the position of the block in the grid of blocks
+
+        Returns:
+            block: the block as an array (blocks on the right and bottom edges can be smaller than the block shape)
+        """
+        key = (block_row, block_col)
+        if(key in self.blocks):
+            self.blocks.move_to_end(key)
+            return self.blocks[key]
+
+        row_off = block_row * self.block_height
+        col_off = block_col * self.block_width
+        window = Window(col_off, row_off, min(self.block_width, self.width - col_off), min(self.block_height, self.height - row_off))
+        block = self.dataset.read(self.band, window=window)
+
+        self.blocks[key] = block
+        self.cached_bytes += block.nbytes
+
+        # evict the least recently used blocks, but always keep the block we just read
+        while(self.cached_bytes > self.cache_bytes and len(self.blocks) > 1):
+            _, evicted = self.blocks.popitem(last=False)
+            self.cached_bytes -= evicted.nbytes
+
+        return block
+
+    def read_window(self, window: Window) -> np.ndarray:
+        """
+        Read a window of the band, assembled from the cached blocks it overlaps.
+
+        Parameters:
+            window: a rasterio Window, which must lie inside the image (see clip_window())
+
+        Returns:
+            array: a 2D array of shape (window.height, window.width)
+        """
+        row_start, col_start = int(window.row_off), int(window.col_off)
+        row_stop, col_stop = row_start + int(window.height), col_start + int(window.width)
+        if(row_start < 0 or col_start < 0 or row_stop > self.height or col_stop > self.width):
+            raise ValueError(f"Window {window} is outside of the image of shape {self.shape}")
+
+        array = np.empty((row_stop - row_start, col_stop - col_start), dtype=self.dtype)
+
+        for block_row in range(row_start // self.block_height, (row_stop - 1) // self.block_height + 1):
+            for block_col in range(col_start // self.block_width, (col_stop - 1) // self.block_width + 1):
+                block = self.read_block(block_row, block_col)
+                block_row_off = block_row * self.block_height
+                block_col_off = block_col * self.block_width
+
+                # the part of the block that overlaps the window, in image coordinates
+                top, bottom = max(row_start, block_row_off), min(row_stop, block_row_off + block.shape[0])
+                left, right = max(col_start, block_col_off), min(col_stop, block_col_off + block.shape[1])
+
+                array[top - row_start:bottom - row_start, left - col_start:right - col_start] = \
+                    block[top - block_row_off:bottom - block_row_off, left - block_col_off:right - block_col_off]
+
+        return array
+
+    def clip_window(self, row_off: int, col_off: int, height: int, width: int) -> Window:
+        """
+        Return the part of a window (which may extend past the image edges) that lies inside the image.
+        """
+        row_start, col_start = max(0, row_off), max(0, col_off)
+        row_stop, col_stop = min(self.height, row_off + height), min(self.width, col_off + width)
+
+        return Window(col_start, row_start, max(0, col_stop - col_start), max(0, row_stop - row_start))
+
+    def tile_shape(self, tile_size: int) -> tuple:
+        """
+        Round a requested tile size up to a whole number of blocks in each direction, so tiles start on block
+        boundaries. Directions in which a single block is larger than tile_size (e.g. the width of a striped TIFF) are
+        left as they are, the cache takes care of blocks shared by several tiles.
+        """
+        tile_height = tile_size if self.block_height > tile_size else -(-tile_size // self.block_height) * self.block_height
+        tile_width = tile_size if self.block_width > tile_size else -(-tile_size // self.block_width) * self.block_width
+
+        return tile_height, tile_width
+
+    def iter_tiles(self, tile_size: int = 1024, halo: int = 0):
+        """
+        Iterate over the image in tiles, row by row, each read with a halo of extra pixels around it.
+
+        Parameters:
+            tile_size: the requested tile size in pixels, rounded up to the block layout (see tile_shape())
+
+            halo: the number of extra pixels read on every side of a tile (clipped at the image edges), so that
+                  processing a tile can see a bit of its neighbors
+
+        Returns:
+            a generator of (tile_window, read_window, array) tuples, where tile_window is the part of the image the tile
+            is responsible for, read_window is tile_window plus the halo, and array holds the pixels of read_window
+        """
+        tile_height, tile_width = self.tile_shape(tile_size)
+
+        for tile_window, read_window in iter_tile_windows(self.height, self.width, tile_height, tile_width, halo):
+            yield tile_window, read_window, self.read_window(read_window)
+
+
+def iter_tile_windows(height: int, width: int, tile_height: int, tile_width: int, halo: int = 0):
+    """
+    Split an image into tiles, row by row, and return the window of each tile, with and without a halo around it.
+
+    Parameters:
+        height, width: the shape of the image
+
+        tile_height, tile_width: the shape of the tiles (tiles on the right and bottom edges can be smaller)
+
+        halo: the number of extra pixels on every side of a tile (clipped at the image edges)
+
+    Returns:
+        a generator of (tile_window, read_window) pairs of rasterio Windows, where read_window is tile_window plus the halo
+    """
+    for row_off in range(0, height, tile_height):
+        for col_off in range(0, width, tile_width):
+            tile_window = Window(col_off, row_off, min(tile_width, width - col_off), min(tile_height, height - row_off))
+
+            read_row_off, read_col_off = max(0, row_off - halo), max(0, col_off - halo)
+            read_window = Window(read_col_off, read_row_off,
+                                 min(width, col_off + tile_width + halo) - read_col_off,
+                                 min(height, row_off + tile_height + halo) - read_row_off)
+
+            yield tile_window, read_window
@@ -0,0 +1,245 @@
+# ---------------------------------------------------------------------------
+#       TGGLinesPlus Algorithm Python Implementation
+#       Website: https://geoair.lipingyang.org/
+#       Copyright (C) 2022-2025 GeoAIR Lab
+#--------------------------------------------------
+#  License
+#     This file is part of TGGLinesPlus.
+
+#     TGGLinesPlus python implementation is free software:
+#     you can redistribute it and/or modify it
+#     under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     TGGLinesPlus is distributed in the hope that it will be useful, but WITHOUT
+#     ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#     FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#     for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with TGGLinesPlus GitHub repository.  If not, see <http://www.gnu.org/licenses/>.
+
+#---------------------------------------------------------------------------
+
+
+
+import itertools
+import zipfile
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from utils.csr_graph import create_csr_graph, find_csr_components
+from utils.process import TGGLinesPlusResult, contract_junction_clusters, degrees_to_node_types, find_node_degrees, flatten_list
+
+
+# bump this when the arrays stored by save_result() change, load_result() refuses files with a newer version
+RESULT_FORMAT_VERSION = 1
+
+
+def flatten_node_lists(node_lists: list):
+    """
+    Store a list of node lists (paths, cliques, ...) as one flat array of nodes and an array of offsets.
+
+    Parameters:
+        node_lists: a list of lists of nodes
+
+    Returns:
+        nodes: an int32 array with every node of every list, one list after another
+
+        offsets: an int64 array of length len(node_lists) + 1, where list i is nodes[offsets[i]:offsets[i+1]]
+    """
+    offsets = np.zeros(len(node_lists) + 1, dtype=np.int64)
+    np.cumsum([len(node_list) for node_list in node_lists], out=offsets[1:])
+    nodes = np.fromiter(itertools.chain.from_iterable(node_lists), dtype=np.int32, count=offsets[-1])
+
+    return nodes, offsets
+
+
+def split_node_lists(nodes: np.ndarray, offsets: np.ndarray) -> list:
+    """
+    The reverse of flatten_node_lists(): turn a flat array of nodes and its offsets back into a list of node lists.
+    """
+    return TGGLinesPlusResult.split_node_lists(nodes, offsets)
+
+
+def save_result(result_dict: dict, filename: str) -> None:
+    """
+    Save a TGGLinesPlus() result to a compact, versioned .npz file, instead of pickling the whole dictionary with its
+    NetworkX graphs, dense skeleton and lookup dictionaries. Only arrays are stored:
+    - skeleton_bits / skeleton_shape: the skeleton, packed 8 pixels to a byte
+    - coordinates: an int32 (N, 2) array with the [x, y] location of every node
+    - node_type_codes: an int8 array with the node type code of every node, see degrees_to_node_types()
+    - removed_edges: an int32 (k, 2) array of removed edges
+    - paths / path_offsets and cliques / clique_offsets: flat node arrays with offsets, see flatten_node_lists()
+    - runtime and version
+    - speckle_pixels / speckle_offsets: only if the result has "speckle_pixels" (see filter_speckle()), stored like the paths
+      with two values (x, y) per pixel
+    - pruned_nodes / pruned_offsets: only if the result has "pruned_nodes" (see prune_spurs())
+    - junction_clusters / junction_cluster_offsets: only if the result has "junction_clusters" (see contract_junction_clusters())
+
+    Everything else in the dictionary (the graphs, subgraphs, lookup dictionaries, ...) is rebuilt from these by load_result().
+    The arrays are stored uncompressed, so that load_result_arrays() can memory-map them.
+
+    Example:
+        save_result(result_dict_1911, "result_dict_1911.npz")
+        loaded_dict = load_result("result_dict_1911.npz")
+
+    Parameters:
+        result_dict: the dictionary returned by TGGLinesPlus()
+
+        filename: the location of the .npz file to write
+    """
+    skeleton = np.asarray(result_dict["skeleton"]).astype(bool)
+    coordinates = np.asarray(result_dict["skeleton_coordinates"], dtype=np.int32).reshape(-1, 2)
+
+    # keep the order of removed edges within each subgraph, the combined list is sorted again when loading
+    # a TGGLinesPlusResult already has them as one array, reading its subgraphs_list would build every subgraph
+    if(isinstance(result_dict, TGGLinesPlusResult)):
+        removed_edges = result_dict.edges_to_remove
+    else:
+        removed_edges = flatten_list([subgraph_dict["removed_edges"] for subgraph_dict in result_dict["subgraphs_list"]])
+    removed_edges = np.asarray(removed_edges, dtype=np.int32).reshape(-1, 2)
+
+    # node types are not stored per node in the result, but they follow from the skeleton and the removed edges
+    # (and from the contracted graph, if junction clusters were contracted)
+    degrees = find_node_degrees(skeleton, removed_edges)
+    if("junction_clusters" in result_dict):
+        simple_csr_graph = create_csr_graph(skeleton)[0].remove_edges(removed_edges)
+        degrees = contract_junction_clusters(simple_csr_graph, degrees, coordinates)[0].degrees()
+    node_type_codes = degrees_to_node_types(degrees)
+
+    paths, path_offsets = flatten_node_lists(result_dict["paths_list"])
+    cliques, clique_offsets = flatten_node_lists(result_dict["cliques"])
+    runtime = result_dict["runtime"] if result_dict["runtime"] is not None else np.nan
+
+    optional_arrays = {}
+    if("speckle_pixels" in result_dict):
+        speckle_pixels, speckle_offsets = flatten_node_lists([flatten_list(component) for component in result_dict["speckle_pixels"]])
+        optional_arrays = {"speckle_pixels": speckle_pixels, "speckle_offsets": speckle_offsets}
+    if("pruned_nodes" in result_dict):
+        optional_arrays["pruned_nodes"], optional_arrays["pruned_offsets"] = flatten_node_lists(result_dict["pruned_nodes"])
+    if("junction_clusters" in result_dict):
+        optional_arrays["junction_clusters"], optional_arrays["junction_cluster_offsets"] = flatten_node_lists(result_dict["junction_clusters"])
+
+    np.savez(filename,
+             version=np.array(RESULT_FORMAT_VERSION),
+             skeleton_bits=np.packbits(skeleton.ravel()),
+             skeleton_shape=np.array(skeleton.shape, dtype=np.int64),
+             coordinates=coordinates,
+             node_type_codes=node_type_codes,
+             removed_edges=removed_edges,
+             paths=paths,
+             path_offsets=path_offsets,
+             cliques=cliques,
+             clique_offsets=clique_offsets,
+             runtime=np.array(runtime, dtype=np.float64),
+             **optional_arrays)
+
+
+def load_result_arrays(filename: str, mmap: bool = True) -> dict:
+    """
+    Load the arrays of a file written by save_result(), memory-mapping them instead of reading them into memory.
+
+    np.load() cannot memory-map arrays inside of an .npz file, but save_result() stores them uncompressed,
+    so each array is a plain .npy file at some offset in the zip file, which we can memory-map directly.
+
+    Parameters:
+        filename: the location of the .npz file
+
+        mmap: whether to memory-map the arrays (read-only), or read them into memory
+
+    Returns:
+        arrays: a dictionary of arrays, with the keys listed in save_result()
+    """
+    arrays = {}
+
+    with zipfile.ZipFile(filename) as zip_file, open(filename, "rb") as file:
+        for info in zip_file.infolist():
+            key = info.filename[:-len(".npy")]
+
+            if(not mmap or info.compress_type != zipfile.ZIP_STORED):
+                with zip_file.open(info) as member:
+                    arrays[key] = npy_format.read_array(member)
+                continue
+
+            # the member's data starts after its local file header: 30 bytes, then the file name and the extra field
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(file.read(4), dtype="<u2")
+            file.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+
+            version = npy_format.read_magic(file)
+            if(version == (1, 0)):
+                shape, fortran_order, dtype = npy_format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = npy_format.read_array_header_2_0(file)
+
+            if(np.prod(shape) == 0):
+                arrays[key] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[key] = np.memmap(filename, dtype=dtype, mode="r", offset=file.tell(), shape=shape,
+                                        order="F" if fortran_order else "C")
+
+    version = int(arrays["version"])
+    if(version > RESULT_FORMAT_VERSION):
+        raise ValueError(f"{filename} was saved with result format version {version}, "
+                         f"but this version of TGGLinesPlus only reads up to version {RESULT_FORMAT_VERSION}")
+
+    return arrays
+
+
+def load_result(filename: str, build_graphs: bool = True, lazy: bool = False) -> dict:
+    """
+    Load a file written by save_result() and rebuild the TGGLinesPlus() result dictionary from it, so that it can be
+    used with the plotting methods like a pickled result.
+
+    Nodes in each subgraph dictionary are listed from smallest to largest, like the "csr" backend of TGGLinesPlus() does.
+
+    Parameters:
+        filename: the location of the .npz file
+
+        build_graphs: whether to rebuild the NetworkX graphs (skeleton_graph and simple_graph, also for each subgraph),
+                      if False these are set to None
+
+        lazy: whether to return a TGGLinesPlusResult, which only rebuilds the values that are accessed, instead of a dictionary
+
+    Returns:
+        result_dict: a dictionary (or TGGLinesPlusResult) with the same keys as TGGLinesPlus() returns
+    """
+    arrays = load_result_arrays(filename)
+
+    shape = tuple(arrays["skeleton_shape"].tolist())
+    skeleton = np.unpackbits(arrays["skeleton_bits"], count=int(np.prod(shape))).reshape(shape).astype(bool)
+
+    # the pixel graph is needed for the components (and the NetworkX graphs), its coordinates are the stored ones
+    _, _, skeleton_array = create_csr_graph(skeleton)
+    labels, component_nodes, component_offsets = find_csr_components(skeleton_array)
+
+    speckle_pixels = None
+    if("speckle_pixels" in arrays):
+        speckle_pixels = [np.reshape(component, (-1, 2)).tolist()
+                          for component in split_node_lists(arrays["speckle_pixels"], arrays["speckle_offsets"])]
+
+    # node lists are passed on as (nodes, offsets) arrays, and only split into lists when they are accessed
+    pruned_nodes = None
+    if("pruned_nodes" in arrays):
+        pruned_nodes = (arrays["pruned_nodes"], arrays["pruned_offsets"])
+
+    junction_clusters = None
+    if("junction_clusters" in arrays):
+        junction_clusters = (arrays["junction_clusters"], arrays["junction_cluster_offsets"])
+
+    runtime = float(arrays["runtime"])
+    result = TGGLinesPlusResult(skeleton, arrays["coordinates"], labels, component_nodes, component_offsets,
+                                (arrays["cliques"], arrays["clique_offsets"]),
+                                np.asarray(arrays["removed_edges"]), np.asarray(arrays["node_type_codes"]),
+                                (arrays["paths"], arrays["path_offsets"]),
+                                runtime=None if np.isnan(runtime) else runtime,
+                                build_graphs=build_graphs, skeleton_array=skeleton_array, speckle_pixels=speckle_pixels,
+                                pruned_nodes=pruned_nodes, junction_clusters=junction_clusters)
+
+    if(lazy):
+        return result
+
+    return result.to_dict()